@@ -2,11 +2,12 @@
 
 from dataclasses import InitVar, dataclass, field
 from enum import Enum, auto
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 from wireviz.wv_colors import COLOR_CODES, Color, ColorMode, Colors, ColorScheme
-from wireviz.wv_helper import aspect_ratio, int2tuple
+from wireviz.wv_helper import aspect_ratio, first_indices, int2tuple
 
 # Each type alias have their legal values described in comments - validation might be implemented in the future
 PlainText = str  # Text not containing HTML tags nor newlines
@@ -58,6 +59,8 @@ class Options:
     color_mode: ColorMode = "SHORT"
     mini_bom_mode: bool = True
     template_separator: str = "."
+    split_components: bool = False
+    layout_timeout: Optional[float] = None
 
     def __post_init__(self):
         if not self.bgcolor_node:
@@ -68,6 +71,15 @@ class Options:
             self.bgcolor_cable = self.bgcolor_node
         if not self.bgcolor_bundle:
             self.bgcolor_bundle = self.bgcolor_cable
+        if self.layout_timeout is not None and (
+            isinstance(self.layout_timeout, bool)
+            or not isinstance(self.layout_timeout, (int, float))
+            or self.layout_timeout <= 0
+        ):
+            raise Exception(
+                "layout_timeout must be a number of seconds greater than 0,"
+                f" but is {self.layout_timeout!r}"
+            )
 
 
 @dataclass
@@ -192,8 +204,14 @@ class Connector:
         if not self.pins:
             self.pins = list(range(1, self.pincount + 1))
 
-        if len(self.pins) != len(set(self.pins)):
+        # lookup tables to resolve pins without scanning the lists
+        self._pin_indices = {pin: index for index, pin in enumerate(self.pins)}
+        if len(self.pins) != len(self._pin_indices):
             raise Exception("Pins are not unique")
+        # index of first occurrence of each pin label, and labels used more than once
+        self._pinlabel_indices, self._ambiguous_pinlabels = first_indices(
+            self.pinlabels
+        )
 
         if self.show_name is None:
             # hide designators for simple and for auto-generated connectors by default
@@ -209,7 +227,7 @@ class Connector:
             if len(loop) != 2:
                 raise Exception("Loops must be between exactly two pins!")
             for pin in loop:
-                if pin not in self.pins:
+                if pin not in self._pin_indices:
                     raise Exception(
                         f'Unknown loop pin "{pin}" for connector "{self.name}"!'
                     )
@@ -220,6 +238,28 @@ class Connector:
             if isinstance(item, dict):
                 self.additional_components[i] = AdditionalComponent(**item)
 
+    def resolve_pin(self, pin: Pin) -> Pin:
+        """Return the pin identified by pin number or pin label."""
+        label_index = self._pinlabel_indices.get(pin)
+        if label_index is not None:
+            # check if provided name is ambiguous
+            pin_index = self._pin_indices.get(pin)
+            if pin_index is not None and pin_index != label_index:
+                raise Exception(
+                    f"{self.name}:{pin} is defined both in pinlabels and pins, for different pins."
+                )
+            # TODO: Maybe issue a warning if present in both lists but referencing the same pin?
+            if pin in self._ambiguous_pinlabels:
+                raise Exception(f"{self.name}:{pin} is defined more than once.")
+            pin = self.pins[label_index]  # map pin name to pin number
+        if pin not in self._pin_indices:
+            raise Exception(f"{self.name}:{pin} not found.")
+        return pin
+
+    def pin_index(self, pin: Pin) -> PinIndex:
+        """Return the zero-based index of the pin number."""
+        return self._pin_indices[pin]
+
     def activate_pin(self, pin: Pin, side: Side) -> None:
         self.visible_pins[pin] = True
         if side == Side.LEFT:
@@ -320,7 +360,7 @@ class Cable:
         elif self.length_unit is None:
             self.length_unit = "m"
 
-        self.connections = []
+        self.connections = ConnectionList()
 
         if self.wirecount:  # number of wires explicitly defined
             if self.colors:  # use custom color palette (partly or looped if needed)
@@ -352,6 +392,14 @@ class Cable:
                     '"s" may not be used as a wire label for a shielded cable.'
                 )
 
+        # lookup tables to resolve wires without scanning the lists:
+        # index of first occurrence of each color and wire label,
+        # and colors and wire labels used more than once
+        self._color_indices, self._ambiguous_colors = first_indices(self.colors)
+        self._wirelabel_indices, self._ambiguous_wirelabels = first_indices(
+            self.wirelabels
+        )
+
         # if lists of part numbers are provided check this is a bundle and that it matches the wirecount.
         for idfield in [self.manufacturer, self.mpn, self.supplier, self.spn, self.pn]:
             if isinstance(idfield, list):
@@ -374,6 +422,32 @@ class Cable:
             if isinstance(item, dict):
                 self.additional_components[i] = AdditionalComponent(**item)
 
+    def resolve_wire(self, wire: Wire) -> Wire:
+        """Return the wire number of the wire identified by color or wire label,
+        or wire unchanged if it is neither (i.e. a wire number or "s" for shield).
+        """
+        color_index = self._color_indices.get(wire)
+        wirelabel_index = self._wirelabel_indices.get(wire)
+        # check if provided name is ambiguous
+        if (
+            color_index is not None
+            and wirelabel_index is not None
+            and color_index != wirelabel_index
+        ):
+            raise Exception(
+                f"{self.name}:{wire} is defined both in colors and wirelabels, for different wires."
+            )
+            # TODO: Maybe issue a warning if present in both lists but referencing the same wire?
+        if color_index is not None:
+            if wire in self._ambiguous_colors:
+                raise Exception(f"{self.name}:{wire} is used for more than one wire.")
+            return color_index + 1  # list index starts at 0, wire IDs start at 1
+        elif wirelabel_index is not None:
+            if wire in self._ambiguous_wirelabels:
+                raise Exception(f"{self.name}:{wire} is used for more than one wire.")
+            return wirelabel_index + 1  # list index starts at 0, wire IDs start at 1
+        return wire
+
     # The *_pin arguments accept a tuple, but it seems not in use with the current code.
     def connect(
         self,
@@ -389,8 +463,8 @@ class Cable:
         if len(from_pin) != len(to_pin):
             raise Exception("from_pin must have the same number of elements as to_pin")
         for i, _ in enumerate(from_pin):
-            self.connections.append(
-                Connection(from_name, from_pin[i], via_wire[i], to_name, to_pin[i])
+            self.connections.add(
+                from_name, from_pin[i], via_wire[i], to_name, to_pin[i]
             )
 
     def get_qty_multiplier(self, qty_multiplier: Optional[CableMultiplier]) -> float:
@@ -410,8 +484,7 @@ class Cable:
             )
 
 
-@dataclass
-class Connection:
+class Connection(NamedTuple):
     from_name: Optional[Designator]
     from_pin: Optional[Pin]
     via_port: Wire
@@ -419,6 +492,74 @@ class Connection:
     to_pin: Optional[Pin]
 
 
+class ConnectionList:
+    """Column-oriented store of the connections of a cable.
+
+    Large harnesses can have tens of thousands of connections, so each field is
+    kept in its own list instead of keeping an object per connection.
+    Iterating and indexing return Connection tuples, created on demand.
+    """
+
+    __slots__ = ("from_names", "from_pins", "via_ports", "to_names", "to_pins")
+
+    def __init__(self) -> None:
+        self.from_names: List[Optional[Designator]] = []
+        self.from_pins: List[Optional[Pin]] = []
+        self.via_ports: List[Wire] = []
+        self.to_names: List[Optional[Designator]] = []
+        self.to_pins: List[Optional[Pin]] = []
+
+    def add(
+        self,
+        from_name: Optional[Designator],
+        from_pin: Optional[Pin],
+        via_port: Wire,
+        to_name: Optional[Designator],
+        to_pin: Optional[Pin],
+    ) -> None:
+        self.from_names.append(from_name)
+        self.from_pins.append(from_pin)
+        self.via_ports.append(via_port)
+        self.to_names.append(to_name)
+        self.to_pins.append(to_pin)
+
+    def append(self, connection: Connection) -> None:
+        self.add(
+            connection.from_name,
+            connection.from_pin,
+            connection.via_port,
+            connection.to_name,
+            connection.to_pin,
+        )
+
+    def __len__(self) -> int:
+        return len(self.via_ports)
+
+    def __iter__(self) -> Iterator[Connection]:
+        # tuple.__new__ builds each tuple directly from the zipped fields,
+        # skipping the argument handling of Connection() and Connection._make()
+        return map(
+            tuple.__new__,
+            repeat(Connection),
+            zip(
+                self.from_names,
+                self.from_pins,
+                self.via_ports,
+                self.to_names,
+                self.to_pins,
+            ),
+        )
+
+    def __getitem__(self, index: int) -> Connection:
+        return Connection(
+            self.from_names[index],
+            self.from_pins[index],
+            self.via_ports[index],
+            self.to_names[index],
+            self.to_pins[index],
+        )
+
+
 @dataclass
 class MatePin:
     from_name: Designator
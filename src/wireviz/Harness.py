@@ -1,37 +1,50 @@
 # -*- coding: utf-8 -*-
 
+import asyncio
 import re
 from collections import Counter
 from dataclasses import dataclass
+from io import StringIO
 from itertools import zip_longest
 from pathlib import Path
-from typing import Any, List, Union
+from typing import Any, Callable, Container, Dict, List, Optional, Union
 
-from graphviz import Graph
+import graphviz
 from wireviz import APP_NAME, APP_URL, __version__, wv_colors
 from wireviz.DataClasses import (
     Cable,
     Connector,
+    Designator,
     MateComponent,
     MatePin,
     Metadata,
     Options,
+    Pin,
     Side,
     Tweak,
 )
-from wireviz.svgembed import embed_svg_images, embed_svg_images_file
+from wireviz.svgembed import (
+    data_URI_base64_bytes,
+    embed_svg_images,
+    embed_svg_images_file,
+)
 from wireviz.wv_bom import (
     HEADER_MPN,
     HEADER_PN,
     HEADER_SPN,
+    BOMKey,
+    bom_entry_key,
     bom_list,
     component_table_entry,
     generate_bom,
     get_additional_component_table,
     pn_info_string,
+    write_bom,
 )
 from wireviz.wv_colors import get_color_hex, translate_color
+from wireviz.wv_dot import DotGraph
 from wireviz.wv_gv_html import (
+    component_label_key,
     html_bgcolor,
     html_bgcolor_attr,
     html_caption,
@@ -39,17 +52,28 @@ from wireviz.wv_gv_html import (
     html_image,
     html_line_breaks,
     nested_html_table,
+    node_label_cache,
     remove_links,
 )
 from wireviz.wv_helper import (
     awg_equiv,
-    file_write_text,
     flatten2d,
     is_arrow,
     mm2_equiv,
-    tuplelist2tsv,
+    open_file_write,
+)
+from wireviz.wv_html import generate_html_output, html_diagram_formats, html_page
+from wireviz.wv_profile import span
+from wireviz.wv_render import (
+    LayoutBudget,
+    estimate_layout_time,
+    render_packed_to_bytes,
+    render_packed_to_bytes_async,
+    render_packed_to_files,
+    render_to_bytes,
+    render_to_bytes_async,
+    render_to_files,
 )
-from wireviz.wv_html import generate_html_output
 
 OLD_CONNECTOR_ATTR = {
     "pinout": "was renamed to 'pinlabels' in v0.2",
@@ -57,6 +81,9 @@ OLD_CONNECTOR_ATTR = {
     "autogenerate": "is replaced with new syntax in v0.4",
 }
 
+# stands in for the component name in cached node labels
+NAME_PLACEHOLDER = "\0name\0"
+
 
 def check_old(node: str, old_attr: dict, args: dict) -> None:
     """Raise exception for any outdated attributes in args."""
@@ -65,6 +92,40 @@ def check_old(node: str, old_attr: dict, args: dict) -> None:
             raise ValueError(f"'{attr}' in {node}: '{attr}' {descr}")
 
 
+def _override_gv_entry(
+    entry: str, override: Dict[str, Dict[str, Optional[str]]]
+) -> str:
+    """Return the raw .gv entry with the matching attribute overrides applied."""
+    # Find a possibly quoted keyword after leading TAB(s) and followed by [ ].
+    match = re.match(r'^\t*(")?((?(1)[^"]|[^ "])+)(?(1)") \[.*\]$', entry, re.S)
+    keyword = match and match[2]
+    if keyword not in override:
+        return entry
+    for attr, value in override[keyword].items():
+        if value is None:
+            entry, n_subs = re.subn(f'( +)?{attr}=("[^"]*"|[^] ]*)(?(1)| *)', "", entry)
+            if n_subs < 1:
+                print(f"Harness.create_graph() warning: {attr} not found in {keyword}!")
+            elif n_subs > 1:
+                print(
+                    f"Harness.create_graph() warning: {attr} removed {n_subs} times in {keyword}!"
+                )
+            continue
+
+        if len(value) == 0 or " " in value:
+            value = value.replace('"', r"\"")
+            value = f'"{value}"'
+        entry, n_subs = re.subn(f'{attr}=("[^"]*"|[^] ]*)', f"{attr}={value}", entry)
+        if n_subs < 1:
+            # If attr not found, then append it
+            entry = re.sub(r"\]$", f" {attr}={value}]", entry)
+        elif n_subs > 1:
+            print(
+                f"Harness.create_graph() warning: {attr} overridden {n_subs} times in {keyword}!"
+            )
+    return entry
+
+
 @dataclass
 class Harness:
     metadata: Metadata
@@ -76,16 +137,25 @@ class Harness:
         self.cables = {}
         self.mates = []
         self._bom = []  # Internal Cache for generated bom
+        self._bom_index = {}  # Internal Cache for id of each bom entry key
         self.additional_bom_items = []
 
+    def _invalidate_bom(self) -> None:
+        """Clear the bom cache after any change that might affect the bom."""
+        self._bom = []
+        self._bom_index = {}
+
     def add_connector(self, name: str, *args, **kwargs) -> None:
         check_old(f"Connector '{name}'", OLD_CONNECTOR_ATTR, kwargs)
         self.connectors[name] = Connector(name, *args, **kwargs)
+        self._invalidate_bom()
 
     def add_cable(self, name: str, *args, **kwargs) -> None:
         self.cables[name] = Cable(name, *args, **kwargs)
+        self._invalidate_bom()
 
     def add_mate_pin(self, from_name, from_pin, to_name, to_pin, arrow_type) -> None:
+        self._invalidate_bom()  # populated pin count might change
         self.mates.append(MatePin(from_name, from_pin, to_name, to_pin, arrow_type))
         self.connectors[from_name].activate_pin(from_pin, Side.RIGHT)
         self.connectors[to_name].activate_pin(to_pin, Side.LEFT)
@@ -95,6 +165,7 @@ class Harness:
 
     def add_bom_item(self, item: dict) -> None:
         self.additional_bom_items.append(item)
+        self._invalidate_bom()
 
     def connect(
         self,
@@ -105,67 +176,357 @@ class Harness:
         to_name: str,
         to_pin: (int, str),
     ) -> None:
-        # check from and to connectors
-        for name, pin in zip([from_name, to_name], [from_pin, to_pin]):
-            if name is not None and name in self.connectors:
-                connector = self.connectors[name]
-                # check if provided name is ambiguous
-                if pin in connector.pins and pin in connector.pinlabels:
-                    if connector.pins.index(pin) != connector.pinlabels.index(pin):
-                        raise Exception(
-                            f"{name}:{pin} is defined both in pinlabels and pins, for different pins."
-                        )
-                    # TODO: Maybe issue a warning if present in both lists but referencing the same pin?
-                if pin in connector.pinlabels:
-                    if connector.pinlabels.count(pin) > 1:
-                        raise Exception(f"{name}:{pin} is defined more than once.")
-                    index = connector.pinlabels.index(pin)
-                    pin = connector.pins[index]  # map pin name to pin number
-                    if name == from_name:
-                        from_pin = pin
-                    if name == to_name:
-                        to_pin = pin
-                if not pin in connector.pins:
-                    raise Exception(f"{name}:{pin} not found.")
-
-        # check via cable
+        # check from and to connectors, and map pin labels to pin numbers
+        if from_name is not None and from_name in self.connectors:
+            from_pin = self.connectors[from_name].resolve_pin(from_pin)
+        if to_name is not None and to_name in self.connectors:
+            to_pin = self.connectors[to_name].resolve_pin(to_pin)
+
+        # check via cable, and map wire colors and labels to wire numbers
         if via_name in self.cables:
-            cable = self.cables[via_name]
-            # check if provided name is ambiguous
-            if via_wire in cable.colors and via_wire in cable.wirelabels:
-                if cable.colors.index(via_wire) != cable.wirelabels.index(via_wire):
-                    raise Exception(
-                        f"{via_name}:{via_wire} is defined both in colors and wirelabels, for different wires."
-                    )
-                # TODO: Maybe issue a warning if present in both lists but referencing the same wire?
-            if via_wire in cable.colors:
-                if cable.colors.count(via_wire) > 1:
-                    raise Exception(
-                        f"{via_name}:{via_wire} is used for more than one wire."
-                    )
-                # list index starts at 0, wire IDs start at 1
-                via_wire = cable.colors.index(via_wire) + 1
-            elif via_wire in cable.wirelabels:
-                if cable.wirelabels.count(via_wire) > 1:
-                    raise Exception(
-                        f"{via_name}:{via_wire} is used for more than one wire."
-                    )
-                via_wire = (
-                    cable.wirelabels.index(via_wire) + 1
-                )  # list index starts at 0, wire IDs start at 1
+            via_wire = self.cables[via_name].resolve_wire(via_wire)
 
         # perform the actual connection
+        self._invalidate_bom()  # terminations and populated pin count might change
         self.cables[via_name].connect(from_name, from_pin, via_wire, to_name, to_pin)
         if from_name in self.connectors:
             self.connectors[from_name].activate_pin(from_pin, Side.RIGHT)
         if to_name in self.connectors:
             self.connectors[to_name].activate_pin(to_pin, Side.LEFT)
 
-    def create_graph(self) -> Graph:
-        dot = Graph()
+    def _connector_label(
+        self, connector: Connector, name: str, additional_rows: List[Any]
+    ) -> str:
+        """Return the HTML node label of the connector, with name as title."""
+        html = []
+        # fmt: off
+        rows = [[f'{html_bgcolor(connector.bgcolor_title)}{name}'
+                    if connector.show_name else None],
+                [pn_info_string(HEADER_PN, None, remove_links(connector.pn)),
+                 html_line_breaks(pn_info_string(HEADER_MPN, connector.manufacturer, connector.mpn)),
+                 html_line_breaks(pn_info_string(HEADER_SPN, connector.supplier, connector.spn))],
+                [html_line_breaks(connector.type),
+                 html_line_breaks(connector.subtype),
+                 f'{connector.pincount}-pin' if connector.show_pincount else None,
+                 translate_color(connector.color, self.options.color_mode) if connector.color else None,
+                 html_colorbar(connector.color)],
+                '<!-- connector table -->' if connector.style != 'simple' else None,
+                [html_image(connector.image)],
+                [html_caption(connector.image)]]
+        # fmt: on
+
+        rows.extend(additional_rows)
+        rows.append([html_line_breaks(connector.notes)])
+        html.extend(nested_html_table(rows, html_bgcolor_attr(connector.bgcolor)))
+
+        if connector.style != "simple":
+            pinhtml = []
+            pinhtml.append(
+                '<table border="0" cellspacing="0" cellpadding="3" cellborder="1">'
+            )
+
+            for pinindex, (pinname, pinlabel, pincolor) in enumerate(
+                zip_longest(connector.pins, connector.pinlabels, connector.pincolors)
+            ):
+                if connector.hide_disconnected_pins and not connector.visible_pins.get(
+                    pinname, False
+                ):
+                    continue
+
+                pinhtml.append("   <tr>")
+                if connector.ports_left:
+                    pinhtml.append(f'    <td port="p{pinindex+1}l">{pinname}</td>')
+                if pinlabel:
+                    pinhtml.append(f"    <td>{pinlabel}</td>")
+                if connector.pincolors:
+                    if pincolor in wv_colors._color_hex.keys():
+                        # fmt: off
+                        pinhtml.append(f'    <td sides="tbl">{translate_color(pincolor, self.options.color_mode)}</td>')
+                        pinhtml.append( '    <td sides="tbr">')
+                        pinhtml.append( '     <table border="0" cellborder="1"><tr>')
+                        pinhtml.append(f'      <td bgcolor="{wv_colors.translate_color(pincolor, "HEX")}" width="8" height="8" fixedsize="true"></td>')
+                        pinhtml.append( '     </tr></table>')
+                        pinhtml.append( '    </td>')
+                        # fmt: on
+                    else:
+                        pinhtml.append('    <td colspan="2"></td>')
+
+                if connector.ports_right:
+                    pinhtml.append(f'    <td port="p{pinindex+1}r">{pinname}</td>')
+                pinhtml.append("   </tr>")
+
+            pinhtml.append("  </table>")
+
+            if len(pinhtml) == 2:  # Table start and end with no rows between?
+                pinhtml = ["<!-- all pins hidden -->"]  # Avoid Graphviz error
+
+            html = [
+                row.replace("<!-- connector table -->", "\n".join(pinhtml))
+                for row in html
+            ]
+        return "\n".join(html)
+
+    def _cable_label(
+        self,
+        cable: Cable,
+        name: str,
+        pad: bool,
+        wire_ends_in: Dict[Union[int, str], str],
+        wire_ends_out: Dict[Union[int, str], str],
+        additional_rows: List[Any],
+    ) -> str:
+        """Return the HTML node label of the cable, with name as title."""
+        html = []
+
+        awg_fmt = ""
+        if cable.show_equiv:
+            # Only convert units we actually know about, i.e. currently
+            # mm2 and awg --- other units _are_ technically allowed,
+            # and passed through as-is.
+            if cable.gauge_unit == "mm\u00B2":
+                awg_fmt = f" ({awg_equiv(cable.gauge)} AWG)"
+            elif cable.gauge_unit.upper() == "AWG":
+                awg_fmt = f" ({mm2_equiv(cable.gauge)} mm\u00B2)"
+
+        # fmt: off
+        rows = [[f'{html_bgcolor(cable.bgcolor_title)}{name}'
+                    if cable.show_name else None],
+                [pn_info_string(HEADER_PN, None,
+                    remove_links(cable.pn)) if not isinstance(cable.pn, list) else None,
+                 html_line_breaks(pn_info_string(HEADER_MPN,
+                    cable.manufacturer if not isinstance(cable.manufacturer, list) else None,
+                    cable.mpn if not isinstance(cable.mpn, list) else None)),
+                 html_line_breaks(pn_info_string(HEADER_SPN,
+                    cable.supplier if not isinstance(cable.supplier, list) else None,
+                    cable.spn if not isinstance(cable.spn, list) else None))],
+                [html_line_breaks(cable.type),
+                 f'{cable.wirecount}x' if cable.show_wirecount else None,
+                 f'{cable.gauge} {cable.gauge_unit}{awg_fmt}' if cable.gauge else None,
+                 '+ S' if cable.shield else None,
+                 f'{cable.length} {cable.length_unit}' if cable.length > 0 else None,
+                 translate_color(cable.color, self.options.color_mode) if cable.color else None,
+                 html_colorbar(cable.color)],
+                '<!-- wire table -->',
+                [html_image(cable.image)],
+                [html_caption(cable.image)]]
+        # fmt: on
+
+        rows.extend(additional_rows)
+        rows.append([html_line_breaks(cable.notes)])
+        html.extend(nested_html_table(rows, html_bgcolor_attr(cable.bgcolor)))
+
+        def wire_end_cell(port: Union[int, str], end: str) -> str:
+            ends = wire_ends_in if end == "in" else wire_ends_out
+            # keep placeholder comment for unconnected wire ends
+            return f"    <td>{ends.get(port, f'<!-- {port}_{end} -->')}</td>"
+
+        wirehtml = []
+        # conductor table
+        wirehtml.append('<table border="0" cellspacing="0" cellborder="0">')
+        wirehtml.append("   <tr><td>&nbsp;</td></tr>")
+
+        for i, (connection_color, wirelabel) in enumerate(
+            zip_longest(cable.colors, cable.wirelabels), 1
+        ):
+            wirehtml.append("   <tr>")
+            wirehtml.append(wire_end_cell(i, "in"))
+            wirehtml.append(f"    <td>")
+
+            wireinfo = []
+            if cable.show_wirenumbers:
+                wireinfo.append(str(i))
+            colorstr = wv_colors.translate_color(
+                connection_color, self.options.color_mode
+            )
+            if colorstr:
+                wireinfo.append(colorstr)
+            if cable.wirelabels:
+                wireinfo.append(wirelabel if wirelabel is not None else "")
+            wirehtml.append(f'     {":".join(wireinfo)}')
+
+            wirehtml.append(f"    </td>")
+            wirehtml.append(wire_end_cell(i, "out"))
+            wirehtml.append("   </tr>")
+
+            # fmt: off
+            bgcolors = ['#000000'] + get_color_hex(connection_color, pad=pad) + ['#000000']
+            wirehtml.append(f"   <tr>")
+            wirehtml.append(f'    <td colspan="3" border="0" cellspacing="0" cellpadding="0" port="w{i}" height="{(2 * len(bgcolors))}">')
+            wirehtml.append('     <table cellspacing="0" cellborder="0" border="0">')
+            for j, bgcolor in enumerate(bgcolors[::-1]):  # Reverse to match the curved wires when more than 2 colors
+                wirehtml.append(f'      <tr><td colspan="3" cellpadding="0" height="2" bgcolor="{bgcolor if bgcolor != "" else wv_colors.default_color}" border="0"></td></tr>')
+            wirehtml.append("     </table>")
+            wirehtml.append("    </td>")
+            wirehtml.append("   </tr>")
+            # fmt: on
+
+            # for bundles, individual wires can have part information
+            if cable.category == "bundle":
+                # create a list of wire parameters
+                wireidentification = []
+                if isinstance(cable.pn, list):
+                    wireidentification.append(
+                        pn_info_string(HEADER_PN, None, remove_links(cable.pn[i - 1]))
+                    )
+                manufacturer_info = pn_info_string(
+                    HEADER_MPN,
+                    (
+                        cable.manufacturer[i - 1]
+                        if isinstance(cable.manufacturer, list)
+                        else None
+                    ),
+                    cable.mpn[i - 1] if isinstance(cable.mpn, list) else None,
+                )
+                supplier_info = pn_info_string(
+                    HEADER_SPN,
+                    (
+                        cable.supplier[i - 1]
+                        if isinstance(cable.supplier, list)
+                        else None
+                    ),
+                    cable.spn[i - 1] if isinstance(cable.spn, list) else None,
+                )
+                if manufacturer_info:
+                    wireidentification.append(html_line_breaks(manufacturer_info))
+                if supplier_info:
+                    wireidentification.append(html_line_breaks(supplier_info))
+                # print parameters into a table row under the wire
+                if len(wireidentification) > 0:
+                    # fmt: off
+                    wirehtml.append('   <tr><td colspan="3">')
+                    wirehtml.append('    <table border="0" cellspacing="0" cellborder="0"><tr>')
+                    for attrib in wireidentification:
+                        wirehtml.append(f"     <td>{attrib}</td>")
+                    wirehtml.append("    </tr></table>")
+                    wirehtml.append("   </td></tr>")
+                    # fmt: on
+
+        if cable.shield:
+            wirehtml.append("   <tr><td>&nbsp;</td></tr>")  # spacer
+            wirehtml.append("   <tr>")
+            wirehtml.append(wire_end_cell("s", "in"))
+            wirehtml.append("    <td>Shield</td>")
+            wirehtml.append(wire_end_cell("s", "out"))
+            wirehtml.append("   </tr>")
+            if isinstance(cable.shield, str):
+                # shield is shown with specified color and black borders
+                shield_color_hex = wv_colors.get_color_hex(cable.shield)[0]
+                attributes = (
+                    f'height="6" bgcolor="{shield_color_hex}" border="2" sides="tb"'
+                )
+            else:
+                # shield is shown as a thin black wire
+                attributes = f'height="2" bgcolor="#000000" border="0"'
+            # fmt: off
+            wirehtml.append(f'   <tr><td colspan="3" cellpadding="0" {attributes} port="ws"></td></tr>')
+            # fmt: on
+
+        wirehtml.append("   <tr><td>&nbsp;</td></tr>")
+        wirehtml.append("  </table>")
+
+        html = [row.replace("<!-- wire table -->", "\n".join(wirehtml)) for row in html]
+        return "\n".join(html)
+
+    def _pin_info_string(self, name: str, pin: Pin) -> str:
+        """Return the text shown in a cable node for a wire end connected to a pin."""
+        connector = self.connectors[name]
+        if not connector.show_name:
+            return ""
+        info = [str(name), str(pin)]
+        if connector.pinlabels:
+            pinlabel = connector.pinlabels[connector.pin_index(pin)]
+            if pinlabel != "":
+                info.append(pinlabel)
+        return ":".join(info)
+
+    def connected_components(self) -> List[List[Designator]]:
+        """Return the designators of the connectors and cables,
+        grouped by the parts of the harness that are connected by wires or mates."""
+        parent = {name: name for name in [*self.connectors, *self.cables]}
+
+        def root(name: Designator) -> Designator:
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]  # path halving
+                name = parent[name]
+            return name
+
+        def join(a: Designator, b: Designator) -> None:
+            parent[root(a)] = root(b)
+
+        for cable in self.cables.values():
+            for connection in cable.connections:
+                if connection.from_name is not None:
+                    join(connection.from_name, cable.name)
+                if connection.to_name is not None:
+                    join(connection.to_name, cable.name)
+        for mate in self.mates:
+            join(mate.from_name, mate.to_name)
+
+        components = {}
+        for name in parent:
+            components.setdefault(root(name), []).append(name)
+        return list(components.values())
+
+    def create_graph(self, designators: Optional[Container] = None) -> DotGraph:
+        """Return the graph of the harness, or of only the connectors, cables
+        and mates between them whose designators are in designators."""
+
+        def typecheck(name: str, value: Any, expect: type) -> None:
+            if not isinstance(value, expect):
+                raise Exception(
+                    f"Unexpected value type of {name}: Expected {expect}, got {type(value)}\n{value}"
+                )
+
+        # TODO?: Differ between override attributes and HTML?
+        override = self.tweak.override or {}
+        if self.tweak.override is not None:
+            typecheck("tweak.override", self.tweak.override, dict)
+            for k, d in self.tweak.override.items():
+                typecheck(f"tweak.override.{k} key", k, str)
+                typecheck(f"tweak.override.{k} value", d, dict)
+                for a, v in d.items():
+                    typecheck(f"tweak.override.{k}.{a} key", a, str)
+                    typecheck(f"tweak.override.{k}.{a} value", v, (str, type(None)))
+
+        def override_attrs(keyword: str, attrs: Dict[str, Any]) -> Dict[str, Any]:
+            """Return the attributes of the .gv entry with the leading string keyword,
+            with the overrides of the entry in tweak.override applied."""
+            for attr, value in override.get(keyword, {}).items():
+                if value is None:
+                    if attrs.pop(attr, None) is None:
+                        print(
+                            f"Harness.create_graph() warning: {attr} not found in {keyword}!"
+                        )
+                else:
+                    attrs[attr] = value
+            return attrs
+
+        # Override generated attributes of entries matching tweak.override
+        # while adding the entries, instead of editing the .gv text afterwards.
+        def attr(keyword: str, **attrs) -> None:
+            dot.attr(keyword, **override_attrs(keyword, attrs))
+
+        def node(name: str, **attrs) -> None:
+            dot.node(name, **override_attrs(name, attrs))
+
+        # edge attributes are written inline on each edge;
+        # edge_attrs keeps track of the attributes set by the previous edges
+        # to keep them as defaults for any edges appended by tweak.append
+        edge_attrs = {}
+
+        def edge(tail: str, head: str, **attrs) -> None:
+            # overrides of "edge" also apply to the attributes set on each edge,
+            # that used to be set by separate edge attribute statements
+            for attr, value in override.get("edge", {}).items():
+                if attr in attrs:
+                    attrs[attr] = value
+            edge_attrs.update(attrs)
+            dot.edge(tail, head, **attrs)
+
+        dot = DotGraph()
         dot.body.append(f"// Graph generated by {APP_NAME} {__version__}\n")
         dot.body.append(f"// {APP_URL}\n")
-        dot.attr(
+        attr(
             "graph",
             rankdir="LR",
             ranksep="2",
@@ -173,7 +534,7 @@ class Harness:
             nodesep="0.33",
             fontname=self.options.fontname,
         )  # TODO: Add graph attribute: charset="utf-8",
-        dot.attr(
+        attr(
             "node",
             shape="none",
             width="0",
@@ -183,85 +544,42 @@ class Harness:
             fillcolor=wv_colors.translate_color(self.options.bgcolor_node, "HEX"),
             fontname=self.options.fontname,
         )
-        dot.attr("edge", style="bold", fontname=self.options.fontname)
+        attr("edge", style="bold", fontname=self.options.fontname)
+
+        # node labels are cached across harnesses, keyed on all they depend on
+        options_key = repr(self.options)
 
         for connector in self.connectors.values():
+            if designators is not None and connector.name not in designators:
+                continue
             # If no wires connected (except maybe loop wires)?
             if not (connector.ports_left or connector.ports_right):
                 connector.ports_left = True  # Use left side pins.
 
-            html = []
-            # fmt: off
-            rows = [[f'{html_bgcolor(connector.bgcolor_title)}{remove_links(connector.name)}'
-                        if connector.show_name else None],
-                    [pn_info_string(HEADER_PN, None, remove_links(connector.pn)),
-                     html_line_breaks(pn_info_string(HEADER_MPN, connector.manufacturer, connector.mpn)),
-                     html_line_breaks(pn_info_string(HEADER_SPN, connector.supplier, connector.spn))],
-                    [html_line_breaks(connector.type),
-                     html_line_breaks(connector.subtype),
-                     f'{connector.pincount}-pin' if connector.show_pincount else None,
-                     translate_color(connector.color, self.options.color_mode) if connector.color else None,
-                     html_colorbar(connector.color)],
-                    '<!-- connector table -->' if connector.style != 'simple' else None,
-                    [html_image(connector.image)],
-                    [html_caption(connector.image)]]
-            # fmt: on
-
-            rows.extend(get_additional_component_table(self, connector))
-            rows.append([html_line_breaks(connector.notes)])
-            html.extend(nested_html_table(rows, html_bgcolor_attr(connector.bgcolor)))
-
-            if connector.style != "simple":
-                pinhtml = []
-                pinhtml.append(
-                    '<table border="0" cellspacing="0" cellpadding="3" cellborder="1">'
-                )
+            additional_rows = get_additional_component_table(self, connector)
+            key = (
+                component_label_key(connector, exclude=("name", "loops")),
+                connector.ports_left,
+                connector.ports_right,
+                # visible_pins is only used when hiding disconnected pins
+                (
+                    frozenset(connector.visible_pins)
+                    if connector.hide_disconnected_pins
+                    else None
+                ),
+                options_key,
+                repr(additional_rows),
+            )
+            html = node_label_cache.get(
+                key,
+                lambda: self._connector_label(
+                    connector, NAME_PLACEHOLDER, additional_rows
+                ),
+            )
+            if connector.show_name:
+                html = html.replace(NAME_PLACEHOLDER, remove_links(connector.name))
 
-                for pinindex, (pinname, pinlabel, pincolor) in enumerate(
-                    zip_longest(
-                        connector.pins, connector.pinlabels, connector.pincolors
-                    )
-                ):
-                    if (
-                        connector.hide_disconnected_pins
-                        and not connector.visible_pins.get(pinname, False)
-                    ):
-                        continue
-
-                    pinhtml.append("   <tr>")
-                    if connector.ports_left:
-                        pinhtml.append(f'    <td port="p{pinindex+1}l">{pinname}</td>')
-                    if pinlabel:
-                        pinhtml.append(f"    <td>{pinlabel}</td>")
-                    if connector.pincolors:
-                        if pincolor in wv_colors._color_hex.keys():
-                            # fmt: off
-                            pinhtml.append(f'    <td sides="tbl">{translate_color(pincolor, self.options.color_mode)}</td>')
-                            pinhtml.append( '    <td sides="tbr">')
-                            pinhtml.append( '     <table border="0" cellborder="1"><tr>')
-                            pinhtml.append(f'      <td bgcolor="{wv_colors.translate_color(pincolor, "HEX")}" width="8" height="8" fixedsize="true"></td>')
-                            pinhtml.append( '     </tr></table>')
-                            pinhtml.append( '    </td>')
-                            # fmt: on
-                        else:
-                            pinhtml.append('    <td colspan="2"></td>')
-
-                    if connector.ports_right:
-                        pinhtml.append(f'    <td port="p{pinindex+1}r">{pinname}</td>')
-                    pinhtml.append("   </tr>")
-
-                pinhtml.append("  </table>")
-
-                if len(pinhtml) == 2:  # Table start and end with no rows between?
-                    pinhtml = ["<!-- all pins hidden -->"]  # Avoid Graphviz error
-
-                html = [
-                    row.replace("<!-- connector table -->", "\n".join(pinhtml))
-                    for row in html
-                ]
-
-            html = "\n".join(html)
-            dot.node(
+            node(
                 connector.name,
                 label=f"<\n{html}\n>",
                 shape="box",
@@ -270,7 +588,6 @@ class Harness:
             )
 
             if len(connector.loops) > 0:
-                dot.attr("edge", color="#000000:#ffffff:#000000")
                 if connector.ports_left:
                     loop_side = "l"
                     loop_dir = "w"
@@ -280,10 +597,11 @@ class Harness:
                 else:
                     raise Exception("No side for loops")
                 for loop in connector.loops:
-                    dot.edge(
+                    edge(
                         f"{connector.name}:p{loop[0]}{loop_side}:{loop_dir}",
                         f"{connector.name}:p{loop[1]}{loop_side}:{loop_dir}",
                         label=" ",  # Work-around to avoid over-sized loops.
+                        color="#000000:#ffffff:#000000",
                     )
 
         # determine if there are double- or triple-colored wires in the harness;
@@ -295,182 +613,73 @@ class Harness:
         )
 
         for cable in self.cables.values():
-            html = []
-
-            awg_fmt = ""
-            if cable.show_equiv:
-                # Only convert units we actually know about, i.e. currently
-                # mm2 and awg --- other units _are_ technically allowed,
-                # and passed through as-is.
-                if cable.gauge_unit == "mm\u00B2":
-                    awg_fmt = f" ({awg_equiv(cable.gauge)} AWG)"
-                elif cable.gauge_unit.upper() == "AWG":
-                    awg_fmt = f" ({mm2_equiv(cable.gauge)} mm\u00B2)"
-
-            # fmt: off
-            rows = [[f'{html_bgcolor(cable.bgcolor_title)}{remove_links(cable.name)}'
-                        if cable.show_name else None],
-                    [pn_info_string(HEADER_PN, None,
-                        remove_links(cable.pn)) if not isinstance(cable.pn, list) else None,
-                     html_line_breaks(pn_info_string(HEADER_MPN,
-                        cable.manufacturer if not isinstance(cable.manufacturer, list) else None,
-                        cable.mpn if not isinstance(cable.mpn, list) else None)),
-                     html_line_breaks(pn_info_string(HEADER_SPN,
-                        cable.supplier if not isinstance(cable.supplier, list) else None,
-                        cable.spn if not isinstance(cable.spn, list) else None))],
-                    [html_line_breaks(cable.type),
-                     f'{cable.wirecount}x' if cable.show_wirecount else None,
-                     f'{cable.gauge} {cable.gauge_unit}{awg_fmt}' if cable.gauge else None,
-                     '+ S' if cable.shield else None,
-                     f'{cable.length} {cable.length_unit}' if cable.length > 0 else None,
-                     translate_color(cable.color, self.options.color_mode) if cable.color else None,
-                     html_colorbar(cable.color)],
-                    '<!-- wire table -->',
-                    [html_image(cable.image)],
-                    [html_caption(cable.image)]]
-            # fmt: on
-
-            rows.extend(get_additional_component_table(self, cable))
-            rows.append([html_line_breaks(cable.notes)])
-            html.extend(nested_html_table(rows, html_bgcolor_attr(cable.bgcolor)))
-
-            wirehtml = []
-            # conductor table
-            wirehtml.append('<table border="0" cellspacing="0" cellborder="0">')
-            wirehtml.append("   <tr><td>&nbsp;</td></tr>")
-
-            for i, (connection_color, wirelabel) in enumerate(
-                zip_longest(cable.colors, cable.wirelabels), 1
-            ):
-                wirehtml.append("   <tr>")
-                wirehtml.append(f"    <td><!-- {i}_in --></td>")
-                wirehtml.append(f"    <td>")
-
-                wireinfo = []
-                if cable.show_wirenumbers:
-                    wireinfo.append(str(i))
-                colorstr = wv_colors.translate_color(
-                    connection_color, self.options.color_mode
-                )
-                if colorstr:
-                    wireinfo.append(colorstr)
-                if cable.wirelabels:
-                    wireinfo.append(wirelabel if wirelabel is not None else "")
-                wirehtml.append(f'     {":".join(wireinfo)}')
-
-                wirehtml.append(f"    </td>")
-                wirehtml.append(f"    <td><!-- {i}_out --></td>")
-                wirehtml.append("   </tr>")
-
-                # fmt: off
-                bgcolors = ['#000000'] + get_color_hex(connection_color, pad=pad) + ['#000000']
-                wirehtml.append(f"   <tr>")
-                wirehtml.append(f'    <td colspan="3" border="0" cellspacing="0" cellpadding="0" port="w{i}" height="{(2 * len(bgcolors))}">')
-                wirehtml.append('     <table cellspacing="0" cellborder="0" border="0">')
-                for j, bgcolor in enumerate(bgcolors[::-1]):  # Reverse to match the curved wires when more than 2 colors
-                    wirehtml.append(f'      <tr><td colspan="3" cellpadding="0" height="2" bgcolor="{bgcolor if bgcolor != "" else wv_colors.default_color}" border="0"></td></tr>')
-                wirehtml.append("     </table>")
-                wirehtml.append("    </td>")
-                wirehtml.append("   </tr>")
-                # fmt: on
-
-                # for bundles, individual wires can have part information
-                if cable.category == "bundle":
-                    # create a list of wire parameters
-                    wireidentification = []
-                    if isinstance(cable.pn, list):
-                        wireidentification.append(
-                            pn_info_string(
-                                HEADER_PN, None, remove_links(cable.pn[i - 1])
-                            )
+            if designators is not None and cable.name not in designators:
+                continue
+            additional_rows = get_additional_component_table(self, cable)
+
+            # text to show at the left (in) and right (out) end of each wire,
+            # keyed on wire number or "s" for the shield;
+            # the first connection to each wire end determines the text
+            wire_ends_in = {}
+            wire_ends_out = {}
+            for connection in cable.connections:
+                if connection.from_pin is not None:  # connect to left
+                    if connection.via_port not in wire_ends_in:
+                        wire_ends_in[connection.via_port] = self._pin_info_string(
+                            connection.from_name, connection.from_pin
+                        )
+                if connection.to_pin is not None:  # connect to right
+                    if connection.via_port not in wire_ends_out:
+                        wire_ends_out[connection.via_port] = self._pin_info_string(
+                            connection.to_name, connection.to_pin
                         )
-                    manufacturer_info = pn_info_string(
-                        HEADER_MPN,
-                        (
-                            cable.manufacturer[i - 1]
-                            if isinstance(cable.manufacturer, list)
-                            else None
-                        ),
-                        cable.mpn[i - 1] if isinstance(cable.mpn, list) else None,
-                    )
-                    supplier_info = pn_info_string(
-                        HEADER_SPN,
-                        (
-                            cable.supplier[i - 1]
-                            if isinstance(cable.supplier, list)
-                            else None
-                        ),
-                        cable.spn[i - 1] if isinstance(cable.spn, list) else None,
-                    )
-                    if manufacturer_info:
-                        wireidentification.append(html_line_breaks(manufacturer_info))
-                    if supplier_info:
-                        wireidentification.append(html_line_breaks(supplier_info))
-                    # print parameters into a table row under the wire
-                    if len(wireidentification) > 0:
-                        # fmt: off
-                        wirehtml.append('   <tr><td colspan="3">')
-                        wirehtml.append('    <table border="0" cellspacing="0" cellborder="0"><tr>')
-                        for attrib in wireidentification:
-                            wirehtml.append(f"     <td>{attrib}</td>")
-                        wirehtml.append("    </tr></table>")
-                        wirehtml.append("   </td></tr>")
-                        # fmt: on
-
-            if cable.shield:
-                wirehtml.append("   <tr><td>&nbsp;</td></tr>")  # spacer
-                wirehtml.append("   <tr>")
-                wirehtml.append("    <td><!-- s_in --></td>")
-                wirehtml.append("    <td>Shield</td>")
-                wirehtml.append("    <td><!-- s_out --></td>")
-                wirehtml.append("   </tr>")
-                if isinstance(cable.shield, str):
-                    # shield is shown with specified color and black borders
-                    shield_color_hex = wv_colors.get_color_hex(cable.shield)[0]
-                    attributes = (
-                        f'height="6" bgcolor="{shield_color_hex}" border="2" sides="tb"'
-                    )
-                else:
-                    # shield is shown as a thin black wire
-                    attributes = f'height="2" bgcolor="#000000" border="0"'
-                # fmt: off
-                wirehtml.append(f'   <tr><td colspan="3" cellpadding="0" {attributes} port="ws"></td></tr>')
-                # fmt: on
 
-            wirehtml.append("   <tr><td>&nbsp;</td></tr>")
-            wirehtml.append("  </table>")
+            key = (
+                component_label_key(cable, exclude=("name",)),
+                pad,
+                frozenset(wire_ends_in.items()),
+                frozenset(wire_ends_out.items()),
+                options_key,
+                repr(additional_rows),
+            )
+            html = node_label_cache.get(
+                key,
+                lambda: self._cable_label(
+                    cable,
+                    NAME_PLACEHOLDER,
+                    pad,
+                    wire_ends_in,
+                    wire_ends_out,
+                    additional_rows,
+                ),
+            )
+            if cable.show_name:
+                html = html.replace(NAME_PLACEHOLDER, remove_links(cable.name))
 
-            html = [
-                row.replace("<!-- wire table -->", "\n".join(wirehtml)) for row in html
-            ]
+            if isinstance(cable.shield, str):
+                shield_color_hex = wv_colors.get_color_hex(cable.shield)[0]
 
             # connections
             for connection in cable.connections:
                 if isinstance(connection.via_port, int):
                     # check if it's an actual wire and not a shield
-                    dot.attr(
-                        "edge",
-                        color=":".join(
-                            ["#000000"]
-                            + wv_colors.get_color_hex(
-                                cable.colors[connection.via_port - 1], pad=pad
-                            )
-                            + ["#000000"]
-                        ),
+                    color = ":".join(
+                        ["#000000"]
+                        + wv_colors.get_color_hex(
+                            cable.colors[connection.via_port - 1], pad=pad
+                        )
+                        + ["#000000"]
                     )
                 else:  # it's a shield connection
                     # shield is shown with specified color and black borders, or as a thin black wire otherwise
-                    dot.attr(
-                        "edge",
-                        color=(
-                            ":".join(["#000000", shield_color_hex, "#000000"])
-                            if isinstance(cable.shield, str)
-                            else "#000000"
-                        ),
+                    color = (
+                        ":".join(["#000000", shield_color_hex, "#000000"])
+                        if isinstance(cable.shield, str)
+                        else "#000000"
                     )
                 if connection.from_pin is not None:  # connect to left
                     from_connector = self.connectors[connection.from_name]
-                    from_pin_index = from_connector.pins.index(connection.from_pin)
+                    from_pin_index = from_connector.pin_index(connection.from_pin)
                     from_port_str = (
                         f":p{from_pin_index+1}r"
                         if from_connector.style != "simple"
@@ -478,53 +687,23 @@ class Harness:
                     )
                     code_left_1 = f"{connection.from_name}{from_port_str}:e"
                     code_left_2 = f"{cable.name}:w{connection.via_port}:w"
-                    dot.edge(code_left_1, code_left_2)
-                    if from_connector.show_name:
-                        from_info = [
-                            str(connection.from_name),
-                            str(connection.from_pin),
-                        ]
-                        if from_connector.pinlabels:
-                            pinlabel = from_connector.pinlabels[from_pin_index]
-                            if pinlabel != "":
-                                from_info.append(pinlabel)
-                        from_string = ":".join(from_info)
-                    else:
-                        from_string = ""
-                    html = [
-                        row.replace(f"<!-- {connection.via_port}_in -->", from_string)
-                        for row in html
-                    ]
+                    edge(code_left_1, code_left_2, color=color)
                 if connection.to_pin is not None:  # connect to right
                     to_connector = self.connectors[connection.to_name]
-                    to_pin_index = to_connector.pins.index(connection.to_pin)
+                    to_pin_index = to_connector.pin_index(connection.to_pin)
                     to_port_str = (
                         f":p{to_pin_index+1}l" if to_connector.style != "simple" else ""
                     )
                     code_right_1 = f"{cable.name}:w{connection.via_port}:e"
                     code_right_2 = f"{connection.to_name}{to_port_str}:w"
-                    dot.edge(code_right_1, code_right_2)
-                    if to_connector.show_name:
-                        to_info = [str(connection.to_name), str(connection.to_pin)]
-                        if to_connector.pinlabels:
-                            pinlabel = to_connector.pinlabels[to_pin_index]
-                            if pinlabel != "":
-                                to_info.append(pinlabel)
-                        to_string = ":".join(to_info)
-                    else:
-                        to_string = ""
-                    html = [
-                        row.replace(f"<!-- {connection.via_port}_out -->", to_string)
-                        for row in html
-                    ]
+                    edge(code_right_1, code_right_2, color=color)
 
             style, bgcolor = (
                 ("filled,dashed", self.options.bgcolor_bundle)
                 if cable.category == "bundle"
                 else ("filled", self.options.bgcolor_cable)
             )
-            html = "\n".join(html)
-            dot.node(
+            node(
                 cable.name,
                 label=f"<\n{html}\n>",
                 shape="box",
@@ -534,6 +713,8 @@ class Harness:
 
         # mates
         for mate in self.mates:
+            if designators is not None and mate.from_name not in designators:
+                continue
             if mate.shape[-1] == ">":
                 dir = "both" if mate.shape[0] == "<" else "forward"
             else:
@@ -549,85 +730,32 @@ class Harness:
             from_connector = self.connectors[mate.from_name]
             to_connector = self.connectors[mate.to_name]
             if isinstance(mate, MatePin) and from_connector.style != "simple":
-                from_pin_index = from_connector.pins.index(mate.from_pin)
+                from_pin_index = from_connector.pin_index(mate.from_pin)
                 from_port_str = f":p{from_pin_index+1}r"
             else:  # MateComponent or style == 'simple'
                 from_port_str = ""
             if isinstance(mate, MatePin) and to_connector.style != "simple":
-                to_pin_index = to_connector.pins.index(mate.to_pin)
+                to_pin_index = to_connector.pin_index(mate.to_pin)
                 to_port_str = f":p{to_pin_index+1}l"
             else:  # MateComponent or style == 'simple'
                 to_port_str = ""
             code_from = f"{mate.from_name}{from_port_str}:e"
             code_to = f"{mate.to_name}{to_port_str}:w"
 
-            dot.attr("edge", color=color, style="dashed", dir=dir)
-            dot.edge(code_from, code_to)
-
-        def typecheck(name: str, value: Any, expect: type) -> None:
-            if not isinstance(value, expect):
-                raise Exception(
-                    f"Unexpected value type of {name}: Expected {expect}, got {type(value)}\n{value}"
-                )
-
-        # TODO?: Differ between override attributes and HTML?
-        if self.tweak.override is not None:
-            typecheck("tweak.override", self.tweak.override, dict)
-            for k, d in self.tweak.override.items():
-                typecheck(f"tweak.override.{k} key", k, str)
-                typecheck(f"tweak.override.{k} value", d, dict)
-                for a, v in d.items():
-                    typecheck(f"tweak.override.{k}.{a} key", a, str)
-                    typecheck(f"tweak.override.{k}.{a} value", v, (str, type(None)))
-
-            # Override generated attributes of selected entries matching tweak.override.
-            for i, entry in enumerate(dot.body):
-                if isinstance(entry, str):
-                    # Find a possibly quoted keyword after leading TAB(s) and followed by [ ].
-                    match = re.match(
-                        r'^\t*(")?((?(1)[^"]|[^ "])+)(?(1)") \[.*\]$', entry, re.S
-                    )
-                    keyword = match and match[2]
-                    if keyword in self.tweak.override.keys():
-                        for attr, value in self.tweak.override[keyword].items():
-                            if value is None:
-                                entry, n_subs = re.subn(
-                                    f'( +)?{attr}=("[^"]*"|[^] ]*)(?(1)| *)', "", entry
-                                )
-                                if n_subs < 1:
-                                    print(
-                                        f"Harness.create_graph() warning: {attr} not found in {keyword}!"
-                                    )
-                                elif n_subs > 1:
-                                    print(
-                                        f"Harness.create_graph() warning: {attr} removed {n_subs} times in {keyword}!"
-                                    )
-                                continue
-
-                            if len(value) == 0 or " " in value:
-                                value = value.replace('"', r"\"")
-                                value = f'"{value}"'
-                            entry, n_subs = re.subn(
-                                f'{attr}=("[^"]*"|[^] ]*)', f"{attr}={value}", entry
-                            )
-                            if n_subs < 1:
-                                # If attr not found, then append it
-                                entry = re.sub(r"\]$", f" {attr}={value}]", entry)
-                            elif n_subs > 1:
-                                print(
-                                    f"Harness.create_graph() warning: {attr} overridden {n_subs} times in {keyword}!"
-                                )
-
-                        dot.body[i] = entry
+            edge(code_from, code_to, color=color, style="dashed", dir=dir)
 
         if self.tweak.append is not None:
             if isinstance(self.tweak.append, list):
                 for i, element in enumerate(self.tweak.append, 1):
                     typecheck(f"tweak.append[{i}]", element, str)
-                dot.body.extend(self.tweak.append)
+                appended = self.tweak.append
             else:
                 typecheck("tweak.append", self.tweak.append, str)
-                dot.body.append(self.tweak.append)
+                appended = [self.tweak.append]
+            edge_attrs.pop("label", None)  # only set on individual edges
+            dot.attr("edge", **edge_attrs)
+            # appended entries are raw .gv text, so any overrides must edit the text
+            dot.body.extend(_override_gv_entry(entry, override) for entry in appended)
 
         # Tweak processing above must be the last before returning dot.
         # Please don't insert any code that might change the dot contents
@@ -635,30 +763,168 @@ class Harness:
 
         return dot
 
-    # cache for the GraphViz Graph object
+    # cache for the DotGraph object
     # do not access directly, use self.graph instead
     _graph = None
 
     @property
     def graph(self):
         if not self._graph:  # no cached graph exists, generate one
-            self._graph = self.create_graph()
+            with span("create_graph"):
+                self._graph = self.create_graph()
         return self._graph  # return cached graph
 
+    # cache for the graphs laid out separately
+    # do not access directly, use self.graphs instead
+    _graphs = None
+
     @property
-    def png(self):
-        from io import BytesIO
+    def graphs(self) -> List[DotGraph]:
+        """The graphs to lay out separately and pack into one diagram:
+        one per connected component when options.split_components is set,
+        otherwise just self.graph."""
+        if not self._graphs:
+            components = (
+                self.connected_components()
+                # appended entries might refer to any part of the harness
+                if self.options.split_components and self.tweak.append is None
+                else []
+            )
+            if len(components) > 1:
+                with span("create_graph", components=len(components)):
+                    self._graphs = [self.create_graph(set(c)) for c in components]
+            else:
+                self._graphs = [self.graph]
+        return self._graphs
+
+    def layout_budget(self, graph: DotGraph) -> Optional[LayoutBudget]:
+        """Return the layout time limit of the graph if options.layout_timeout is set,
+        with its layout time estimated from the number of nodes, edges and ports."""
+        if self.options.layout_timeout is None:
+            return None
+        estimate = estimate_layout_time(graph.nodes, graph.edges, graph.ports)
+        return LayoutBudget(self.options.layout_timeout, estimate)
+
+    def _render_to_bytes(self, fmt: str) -> bytes:
+        graphs = self.graphs
+        budgets = [self.layout_budget(graph) for graph in graphs]
+        if len(graphs) > 1:
+            sources = [graph.source for graph in graphs]
+            return render_packed_to_bytes(sources, fmt, DotGraph.encoding, budgets)
+        graph = graphs[0]
+        return render_to_bytes(graph.source, fmt, graph.encoding, budgets[0])
+
+    async def _render_to_bytes_async(self, fmt: str) -> bytes:
+        graphs = self.graphs
+        budgets = [self.layout_budget(graph) for graph in graphs]
+        if len(graphs) > 1:
+            sources = [graph.source for graph in graphs]
+            return await render_packed_to_bytes_async(
+                sources, fmt, DotGraph.encoding, budgets
+            )
+        graph = graphs[0]
+        return await render_to_bytes_async(
+            graph.source, fmt, graph.encoding, budgets[0]
+        )
 
-        graph = self.graph
-        data = BytesIO()
-        data.write(graph.pipe(format="png"))
-        data.seek(0)
-        return data.read()
+    @property
+    def png(self):
+        return self._render_to_bytes("png")
 
     @property
     def svg(self):  # TODO?: Verify xml encoding="utf-8" in SVG?
-        graph = self.graph
-        return embed_svg_images(graph.pipe(format="svg").decode("utf-8"), Path.cwd())
+        svg = self._render_to_bytes("svg")
+        return embed_svg_images(svg.decode("utf-8"), Path.cwd())
+
+    def render_outputs(
+        self,
+        fmt: tuple = ("html", "png", "svg", "tsv"),
+        filename: Union[str, Path, None] = None,
+    ) -> Dict[str, Union[bytes, str]]:
+        """Return the output formats generated in memory, without using any files.
+
+        The result maps each format to its contents:
+        bytes for "png", and str for "csv", "gv", "html", "svg" and "tsv".
+        The optional filename (without extension) is only used by the HTML output,
+        to locate the template and for the filename placeholders.
+        """
+        rendered = {}  # raw Graphviz output of each format, rendered when needed
+
+        def render(f: str) -> bytes:
+            if f not in rendered:
+                rendered[f] = self._render_to_bytes(f)
+            return rendered[f]
+
+        return self._generate_outputs(fmt, filename, render)
+
+    async def render_outputs_async(
+        self,
+        fmt: tuple = ("html", "png", "svg", "tsv"),
+        filename: Union[str, Path, None] = None,
+    ) -> Dict[str, Union[bytes, str]]:
+        """Like render_outputs(), but running Graphviz as asynchronous subprocesses."""
+        # determine the Graphviz formats needed, and render them concurrently
+        graphviz_formats = {f for f in ("png", "svg") if f in fmt}
+        if "html" in fmt:
+            graphviz_formats |= html_diagram_formats(filename, self.metadata)
+        graphviz_formats = sorted(graphviz_formats)
+        data = await asyncio.gather(
+            *(self._render_to_bytes_async(f) for f in graphviz_formats)
+        )
+        rendered = dict(zip(graphviz_formats, data))
+        return self._generate_outputs(fmt, filename, rendered.__getitem__)
+
+    async def render_async(self, fmt: str) -> Union[bytes, str]:
+        """Return one output format generated in memory (see render_outputs()),
+        running Graphviz as an asynchronous subprocess."""
+        return (await self.render_outputs_async((fmt,)))[fmt]
+
+    def _generate_outputs(
+        self,
+        fmt: tuple,
+        filename: Union[str, Path, None],
+        render: Callable[[str], bytes],
+    ) -> Dict[str, Union[bytes, str]]:
+        """Return the output formats generated in memory,
+        using render() to get the raw Graphviz output of each graphical format."""
+        outputs = {}
+
+        def svg() -> str:  # TODO?: Verify xml encoding="utf-8" in SVG?
+            if "svg" not in outputs:
+                svg = render("svg").decode("utf-8")
+                with span("embed_svg_images"):
+                    outputs["svg"] = embed_svg_images(svg, Path.cwd())
+            return outputs["svg"]
+
+        # graphical output
+        if "png" in fmt:
+            outputs["png"] = render("png")
+        if "svg" in fmt:
+            svg()
+        # GraphViz output
+        if "gv" in fmt:
+            outputs["gv"] = self.graph.source
+        # BOM output
+        if any(f in fmt for f in ("tsv", "csv", "html")):
+            bomlist = bom_list(self.bom())
+        for f in ("tsv", "csv"):
+            if f in fmt:
+                data = StringIO()
+                write_bom(data, bomlist, f)
+                outputs[f] = data.getvalue()
+        # HTML output
+        if "html" in fmt:
+            with span("html_page"):
+                outputs["html"] = html_page(
+                    filename,
+                    bomlist,
+                    self.metadata,
+                    self.options,
+                    svg=svg,
+                    png_data_uri=lambda: data_URI_base64_bytes(render("png"), "png"),
+                )
+        # only return the requested formats (SVG might be generated for HTML only)
+        return {f: outputs[f] for f in fmt if f in outputs}
 
     def output(
         self,
@@ -667,37 +933,47 @@ class Harness:
         cleanup: bool = True,
         fmt: tuple = ("html", "png", "svg", "tsv"),
     ) -> None:
-        # graphical output
         graph = self.graph
-        svg_already_exists = Path(
-            f"{filename}.svg"
-        ).exists()  # if SVG already exists, do not delete later
         # graphical output
-        for f in fmt:
-            if f in ("png", "svg", "html"):
-                if f == "html":  # if HTML format is specified,
-                    f = "svg"  # generate SVG for embedding into HTML
-                # SVG file will be renamed/deleted later
-                _filename = f"{filename}.tmp" if f == "svg" else filename
-                # TODO: prevent rendering SVG twice when both SVG and HTML are specified
-                graph.format = f
-                graph.render(filename=_filename, view=view, cleanup=cleanup)
+        # all formats are rendered from a single Graphviz layout pass
+        graphical_outfiles = {}
+        if "png" in fmt:
+            graphical_outfiles["png"] = f"{filename}.png"
+        if "svg" in fmt or "html" in fmt:
+            # generate SVG also for embedding into HTML
+            # SVG file will be renamed/deleted later
+            graphical_outfiles["svg"] = f"{filename}.tmp.svg"
+        if graphical_outfiles:
+            graphs = self.graphs
+            budgets = [self.layout_budget(g) for g in graphs]
+            if len(graphs) > 1:  # parts laid out separately
+                sources = [g.source for g in graphs]
+                render_packed_to_files(
+                    sources, graphical_outfiles, DotGraph.encoding, budgets
+                )
+            else:
+                render_to_files(
+                    graph.lines(), graphical_outfiles, graph.encoding, budgets[0]
+                )
         # embed images into SVG output
         if "svg" in fmt or "html" in fmt:
-            embed_svg_images_file(f"{filename}.tmp.svg")
+            with span("embed_svg_images_file"):
+                embed_svg_images_file(f"{filename}.tmp.svg")
         # GraphViz output
         if "gv" in fmt:
             graph.save(filename=f"{filename}.gv")
         # BOM output
         bomlist = bom_list(self.bom())
         if "tsv" in fmt:
-            file_write_text(f"{filename}.bom.tsv", tuplelist2tsv(bomlist))
+            with open_file_write(f"{filename}.bom.tsv") as file:
+                write_bom(file, bomlist, "tsv")
         if "csv" in fmt:
-            # TODO: implement CSV output (preferrably using CSV library)
-            print("CSV output is not yet supported")
+            with open_file_write(f"{filename}.bom.csv", newline="") as file:
+                write_bom(file, bomlist, "csv")
         # HTML output
         if "html" in fmt:
-            generate_html_output(filename, bomlist, self.metadata, self.options)
+            with span("generate_html_output"):
+                generate_html_output(filename, bomlist, self.metadata, self.options)
         # PDF output
         if "pdf" in fmt:
             # TODO: implement PDF output
@@ -708,8 +984,24 @@ class Harness:
             Path(f"{filename}.tmp.svg").unlink()
         elif "svg" in fmt:
             Path(f"{filename}.tmp.svg").replace(f"{filename}.svg")
+        if view:
+            for f in ("png", "svg"):
+                if f in fmt:
+                    graphviz.view(f"{filename}.{f}")
 
     def bom(self):
         if not self._bom:
-            self._bom = generate_bom(self)
+            with span("generate_bom"):
+                self._bom = generate_bom(self)
+            self._bom_index = {bom_entry_key(entry): entry["id"] for entry in self._bom}
         return self._bom
+
+    def bom_id(self, key: BOMKey) -> int:
+        """Return id of BOM entry or raise exception if not found."""
+        self.bom()  # make sure the bom and its index are generated
+        try:
+            return self._bom_index[key]
+        except KeyError:
+            raise Exception(
+                "Internal error: No BOM entry found matching: " + "|".join(key)
+            )
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import gc
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+script_path = Path(__file__).absolute()
+
+sys.path.insert(0, str(script_path.parent.parent))  # to find wireviz module
+
+from wireviz import APP_NAME, __version__, wireviz
+from wireviz.wv_bom import generate_bom
+
+
+def harness_input(count, variants):
+    """Return the input of a harness with count connectors and count cables,
+    each with one additional component, in a number of part variants.
+    Each connector is connected to one end of a cable."""
+    connectors = {}
+    cables = {}
+    for i in range(count):
+        variant = i % variants
+        connectors[f"X{i}"] = {
+            "type": "Molex KK 254",
+            "subtype": "female",
+            "pincount": 4,
+            "manufacturer": "Molex",
+            "mpn": f"22013{variant:03}",
+            "pn": f"CON-{variant}",
+            "additional_components": [
+                {"type": "Crimp", "qty_multiplier": "populated", "pn": "CRIMP-1"}
+            ],
+        }
+        cables[f"W{i}"] = {
+            "wirecount": 4,
+            "color_code": "DIN",
+            "gauge": "0.25 mm2",
+            "length": 0.2 + variant / 10,
+            "manufacturer": "Lapp",
+            "mpn": f"LIYY-{variant}",
+            "additional_components": [
+                {"type": "Sleeve", "qty_multiplier": "length", "pn": "SLV-1"}
+            ],
+        }
+    connections = [[{f"X{i}": "1-4"}, {f"W{i}": "1-4"}] for i in range(count)]
+    return {"connectors": connectors, "cables": cables, "connections": connections}
+
+
+def measure(harness, repeat):
+    """Return the median time [s] and the peak traced memory [bytes] of
+    generate_bom()."""
+    times = []
+    for _ in range(repeat):
+        gc.disable()  # like timeit, to not measure collections of unrelated objects
+        start = time.perf_counter()
+        generate_bom(harness)
+        times.append(time.perf_counter() - start)
+        gc.enable()
+    tracemalloc.start()
+    generate_bom(harness)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def benchmark(count, variants, repeat):
+    print(f"Parsing a harness with {count} connectors and {count} cables")
+    harness = wireviz.parse(harness_input(count, variants), return_types="harness")
+    seconds, peak = measure(harness, repeat)
+    print(f"generate_bom(), median of {repeat} runs")
+    print(f"  time:                {seconds * 1000:>10.1f} ms")
+    print(f"  peak traced memory:  {peak / 2**20:>10.1f} MiB")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=f"{APP_NAME} BOM generation benchmark",
+    )
+    parser.add_argument(
+        "-V",
+        "--version",
+        action="version",
+        version=f"%(prog)s - {APP_NAME} {__version__}",
+    )
+    parser.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        default=5000,
+        help="number of connectors, and of cables, of the harness (default: 5000)",
+    )
+    parser.add_argument(
+        "-v",
+        "--variants",
+        type=int,
+        default=50,
+        help="number of different part numbers per component type (default: 50)",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=3,
+        help="number of runs to take the median time of (default: 3)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    benchmark(args.count, args.variants, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
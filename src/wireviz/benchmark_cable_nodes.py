@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import gc
+import statistics
+import sys
+import time
+from pathlib import Path
+
+script_path = Path(__file__).absolute()
+
+sys.path.insert(0, str(script_path.parent.parent))  # to find wireviz module
+
+from wireviz import APP_NAME, __version__, wireviz
+from wireviz.wv_gv_html import node_label_cache
+
+
+def bundle(wirecount, color_code):
+    """Return the input of a harness with a bundle of wirecount wires
+    between two connectors."""
+    pins = f"1-{wirecount}"
+    return {
+        "connectors": {
+            "X1": {"pincount": wirecount},
+            "X2": {"pincount": wirecount},
+        },
+        "cables": {
+            "W1": {"wirecount": wirecount, "color_code": color_code},
+        },
+        "connections": [[{"X1": pins}, {"W1": pins}, {"X2": pins}]],
+    }
+
+
+def timed_create_graph(wirecount, color_code, repeat):
+    """Return the median time [s] of create_graph() for a bundle of wirecount wires."""
+    harness = wireviz.parse(bundle(wirecount, color_code), return_types="harness")
+    times = []
+    for _ in range(repeat):
+        node_label_cache.clear()  # measure building the node labels, not the cache
+        gc.disable()  # like timeit, to not measure collections of unrelated objects
+        start = time.perf_counter()
+        harness.create_graph()
+        times.append(time.perf_counter() - start)
+        gc.enable()
+    return statistics.median(times)
+
+
+def benchmark(wirecounts, color_code, repeat):
+    print(f"create_graph() of X1 - W1 - X2 bundles, median of {repeat} runs")
+    print(f"  {'wires':>8}{'time [ms]':>14}{'per wire [us]':>16}")
+    for wirecount in wirecounts:
+        seconds = timed_create_graph(wirecount, color_code, repeat)
+        print(
+            f"  {wirecount:>8}{seconds * 1000:>14.1f}"
+            f"{seconds * 1e6 / wirecount:>16.1f}"
+        )
+    print("The time per wire stays about constant when scaling linearly.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=f"{APP_NAME} cable node scaling benchmark",
+    )
+    parser.add_argument(
+        "-V",
+        "--version",
+        action="version",
+        version=f"%(prog)s - {APP_NAME} {__version__}",
+    )
+    parser.add_argument(
+        "-w",
+        "--wirecounts",
+        nargs="+",
+        type=int,
+        default=[100, 200, 400, 800, 1600],
+        help="numbers of wires of the bundles (default: 100 200 400 800 1600)",
+    )
+    parser.add_argument(
+        "-c",
+        "--color-code",
+        default="DIN",
+        help="color code of the wires (default: DIN)",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=5,
+        help="number of runs to take the median time of (default: 5)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    benchmark(args.wirecounts, args.color_code, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import statistics
+import sys
+import time
+from itertools import cycle, islice
+from pathlib import Path
+
+script_path = Path(__file__).absolute()
+
+sys.path.insert(0, str(script_path.parent.parent))  # to find wireviz module
+
+from wireviz import APP_NAME, __version__, wv_colors
+
+COLOR_MODES = ("SHORT", "full", "hex", "ger")
+
+
+def clear_caches():
+    for function in (wv_colors.translate_color, wv_colors._get_color_hex):
+        if hasattr(function, "cache_clear"):
+            function.cache_clear()
+
+
+def color_handling(colors):
+    """Do the color lookups of create_graph() and the BOM for each wire."""
+    for color in colors:
+        for color_mode in COLOR_MODES:
+            wv_colors.translate_color(color, color_mode)
+        hex_color = ":".join(wv_colors.get_color_hex(color))
+        wv_colors.get_color_hex(color, pad=True)
+        wv_colors.translate_color(hex_color, "full")
+
+
+def timed(colors, repeat, cold):
+    """Return the median time [s] of the color handling of all wires."""
+    times = []
+    for _ in range(repeat):
+        if cold:
+            clear_caches()
+        start = time.perf_counter()
+        color_handling(colors)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def benchmark(wirecount, repeat, cold):
+    print(
+        f"Color handling of {wirecount}-wire bundles, median of {repeat} runs"
+        + (" (caches cleared before each run)" if cold else "")
+    )
+    print(f"  {'color code':<12}{'time [ms]':>12}{'per wire [us]':>16}")
+    total = 0
+    for name, code in wv_colors.COLOR_CODES.items():
+        colors = list(islice(cycle(code), wirecount))
+        seconds = timed(colors, repeat, cold)
+        total += seconds
+        print(f"  {name:<12}{seconds * 1000:>12.2f}{seconds * 1e6 / wirecount:>16.2f}")
+    print(f"  {'all':<12}{total * 1000:>12.2f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=f"{APP_NAME} color handling micro-benchmark",
+    )
+    parser.add_argument(
+        "-V",
+        "--version",
+        action="version",
+        version=f"%(prog)s - {APP_NAME} {__version__}",
+    )
+    parser.add_argument(
+        "-w",
+        "--wirecount",
+        type=int,
+        default=400,
+        help="number of wires of each bundle (default: 400)",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=20,
+        help="number of runs to take the median time of (default: 20)",
+    )
+    parser.add_argument(
+        "-c",
+        "--cold",
+        action="store_true",
+        help="clear the color caches before each run (default: False)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    benchmark(args.wirecount, args.repeat, args.cold)
+
+
+if __name__ == "__main__":
+    main()
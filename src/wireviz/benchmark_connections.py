@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+script_path = Path(__file__).absolute()
+
+sys.path.insert(0, str(script_path.parent.parent))  # to find wireviz module
+
+from wireviz import APP_NAME, __version__
+from wireviz.DataClasses import ConnectionList, Designator, Pin, Wire
+
+
+@dataclass
+class ObjectConnection:
+    """A connection stored as one object per connection, for comparison."""
+
+    from_name: Optional[Designator]
+    from_pin: Optional[Pin]
+    via_port: Wire
+    to_name: Optional[Designator]
+    to_pin: Optional[Pin]
+
+
+def connection_fields(count, pins):
+    """Yield the fields of count connections of a cable between two connectors."""
+    for i in range(count):
+        pin = i % pins + 1
+        yield "X1", pin, i + 1, "X2", pin
+
+
+def build_objects(count, pins):
+    return [ObjectConnection(*fields) for fields in connection_fields(count, pins)]
+
+
+def build_columns(count, pins):
+    connections = ConnectionList()
+    for fields in connection_fields(count, pins):
+        connections.add(*fields)
+    return connections
+
+
+def measure_memory(build, count, pins):
+    """Return the memory [bytes] allocated by the connections built."""
+    tracemalloc.start()
+    connections = build(count, pins)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del connections
+    return size
+
+
+def measure_iteration(connections, repeat):
+    """Return the median time [s] to iterate over the connections, reading fields
+    like create_graph() does."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for connection in connections:
+            connection.from_name, connection.via_port, connection.to_name
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def benchmark(count, pins, repeat):
+    print(f"{count} connections of one cable, median of {repeat} iterations")
+    for label, build in (
+        ("one object per connection", build_objects),
+        ("ConnectionList", build_columns),
+    ):
+        size = measure_memory(build, count, pins)
+        seconds = measure_iteration(build(count, pins), repeat)
+        print(
+            f"  {label:<28}{size / count:>10.1f} B/connection"
+            f"{seconds * 1e6 / count:>10.3f} us/connection iterated"
+        )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=f"{APP_NAME} cable connection storage benchmark",
+    )
+    parser.add_argument(
+        "-V",
+        "--version",
+        action="version",
+        version=f"%(prog)s - {APP_NAME} {__version__}",
+    )
+    parser.add_argument(
+        "-n",
+        "--connections",
+        type=int,
+        default=50000,
+        help="number of connections of the cable (default: 50000)",
+    )
+    parser.add_argument(
+        "-p",
+        "--pins",
+        type=int,
+        default=64,
+        help="number of pins of the connectors at both ends (default: 64)",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=5,
+        help="number of iterations to take the median time of (default: 5)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    benchmark(args.connections, args.pins, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import gc
+import statistics
+import sys
+import time
+from pathlib import Path
+
+script_path = Path(__file__).absolute()
+
+sys.path.insert(0, str(script_path.parent.parent))  # to find wireviz module
+
+from wireviz import APP_NAME, __version__, wireviz
+from wireviz.wv_helper import expand
+
+
+def harness_input(sets, pins):
+    """Return the input of a harness with sets connection sets of pins connections
+    each, from a connector through a cable to another connector."""
+    connectors = {}
+    cables = {}
+    connections = []
+    for i in range(1, sets + 1):
+        connectors[f"X{i}A"] = {"pincount": pins}
+        connectors[f"X{i}B"] = {"pincount": pins}
+        cables[f"W{i}"] = {"wirecount": pins}
+        pin_list = list(range(1, pins + 1))
+        # pins as explicit lists on the connectors and as a range on the cable
+        connections.append(
+            [{f"X{i}A": pin_list}, {f"W{i}": f"1-{pins}"}, {f"X{i}B": pin_list[::-1]}]
+        )
+    return {"connectors": connectors, "cables": cables, "connections": connections}
+
+
+def timed(function, repeat):
+    """Return the median time [s] of repeat calls of function."""
+    times = []
+    for _ in range(repeat):
+        gc.disable()  # like timeit, to not measure collections of unrelated objects
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+        gc.enable()
+    return statistics.median(times)
+
+
+def benchmark(sets, pins, repeat):
+    print(f"{sets} connection sets of {pins} pins each, median of {repeat} runs")
+    # the input is built anew for each parse, as parsing consumes parts of it
+    build = timed(lambda: harness_input(sets, pins), repeat)
+    parse = timed(
+        lambda: wireviz.parse(harness_input(sets, pins), return_types="harness"),
+        repeat,
+    )
+    print(f"  {'parse(), harness only':<28}{(parse - build) * 1000:>10.1f} ms")
+    ranges = [f"{i * pins + 1}-{(i + 1) * pins}" for i in range(5)]
+    ints = list(range(1, pins + 1))
+    print(
+        f"  {'expand(), 5 ranges':<28}"
+        f"{timed(lambda: expand(ranges), repeat) * 1000:>10.2f} ms"
+    )
+    print(
+        f"  {f'expand(), {pins} ints':<28}"
+        f"{timed(lambda: expand(ints), repeat) * 1000:>10.2f} ms"
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=f"{APP_NAME} connection set parsing benchmark",
+    )
+    parser.add_argument(
+        "-V",
+        "--version",
+        action="version",
+        version=f"%(prog)s - {APP_NAME} {__version__}",
+    )
+    parser.add_argument(
+        "-s",
+        "--sets",
+        type=int,
+        default=3,
+        help="number of connection sets (default: 3)",
+    )
+    parser.add_argument(
+        "-p",
+        "--pins",
+        type=int,
+        default=4000,
+        help="number of pins per connection set (default: 4000)",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=5,
+        help="number of runs to take the median time of (default: 5)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    benchmark(args.sets, args.pins, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import graphviz
+
+script_path = Path(__file__).absolute()
+
+sys.path.insert(0, str(script_path.parent.parent))  # to find wireviz module
+
+from wireviz import APP_NAME, __version__, wireviz, wv_render
+
+dir = script_path.parent.parent.parent
+inputs = sorted((dir / "examples").glob("ex*.yml")) + sorted(
+    (dir / "tutorial").glob("tutorial*.yml")
+)
+
+
+def collect_sources():
+    print(f"Collecting Graphviz sources of {len(inputs)} files")
+    return [wireviz.parse(yaml_file, return_types="gv") for yaml_file in inputs]
+
+
+def timed(render, sources, repeat):
+    """Return the wall time [s] of each of repeat runs of render over all sources."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for source in sources:
+            render(source)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def report(label, times, count):
+    median = statistics.median(times)
+    print(
+        f"  {label:<32}{median * 1000:>10.1f} ms"
+        f"{median * 1000 / count:>10.2f} ms/graph"
+    )
+    return median
+
+
+def check_identical(sources, fmt):
+    """Check that the worker pool renders the same output as a Graphviz run."""
+    for yaml_file, source in zip(inputs, sources):
+        wv_render.set_worker_pool(0)
+        expected = wv_render.render_to_bytes(source, fmt)
+        wv_render.set_worker_pool(1)
+        if wv_render.render_to_bytes(source, fmt) != expected:
+            print(f'  {fmt}: output of "{yaml_file.name}" differs')
+            return False
+    print(f"  {fmt}: worker pool output identical for all files")
+    return True
+
+
+def check_errors(fmt):
+    """Check that the worker pool fails for a graph with an error, like a Graphviz
+    run, without blaming the error on the next graph."""
+    wv_render.set_worker_pool(1)
+    bad, good = "graph {\n  a [label=<<b>x</i>>]\n}\n", "graph {\n  c -- d\n}\n"
+    for _ in range(10):
+        try:
+            wv_render.render_to_bytes(bad, fmt)
+            print(f"  {fmt}: graph with an error rendered without error")
+            return False
+        except graphviz.CalledProcessError:
+            pass
+        try:
+            wv_render.render_to_bytes(good, fmt)
+        except graphviz.CalledProcessError as e:
+            print(f"  {fmt}: graph after a graph with an error failed: {e}")
+            return False
+    print(f"  {fmt}: worker pool errors reported for the failing graph only")
+    return True
+
+
+def benchmark(formats, repeat):
+    wv_render.set_render_cache(None)  # measure Graphviz, not the cache
+    sources = collect_sources()
+    count = len(sources)
+
+    print("Validating worker pool output")
+    ok = all(check_identical(sources, fmt) for fmt in formats)
+    ok = all([check_errors(fmt) for fmt in formats]) and ok
+
+    print(f"Rendering {count} graphs, median of {repeat} runs")
+    for fmt in formats:
+        wv_render.set_worker_pool(0)
+        subprocess_time = report(
+            f"{fmt}, Graphviz per graph",
+            timed(lambda s: wv_render.render_to_bytes(s, fmt), sources, repeat),
+            count,
+        )
+        wv_render.set_worker_pool(1)
+        wv_render.render_to_bytes(sources[0], fmt)  # start the worker
+        pool_time = report(
+            f"{fmt}, worker pool",
+            timed(lambda s: wv_render.render_to_bytes(s, fmt), sources, repeat),
+            count,
+        )
+        print(f"  {'speedup':<32}{subprocess_time / pool_time:>10.2f} x")
+
+    # output() renders all formats into files at once, with the worker pool
+    # only used when a single format is rendered
+    with TemporaryDirectory() as tmp:
+        outfiles = {fmt: Path(tmp) / f"out.{fmt}" for fmt in formats}
+        wv_render.set_worker_pool(0)
+        report(
+            f"{'+'.join(formats)} files, one run",
+            timed(lambda s: wv_render.render_to_files(s, outfiles), sources, repeat),
+            count,
+        )
+    wv_render.set_worker_pool(0)
+    return ok
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=f"{APP_NAME} Graphviz worker pool benchmark",
+    )
+    parser.add_argument(
+        "-V",
+        "--version",
+        action="version",
+        version=f"%(prog)s - {APP_NAME} {__version__}",
+    )
+    parser.add_argument(
+        "-f",
+        "--formats",
+        nargs="+",
+        choices=wv_render.GraphvizWorker.formats,
+        default=list(wv_render.GraphvizWorker.formats),
+        help="output formats to render (default: all supported by the worker pool)",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=5,
+        help="number of runs to take the median time of (default: 5)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not benchmark(args.formats, args.repeat):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ script_path = Path(__file__).absolute()
 sys.path.insert(0, str(script_path.parent.parent))  # to find wireviz module
 from wv_helper import open_file_append, open_file_read, open_file_write
 
-from wireviz import APP_NAME, __version__, wireviz
+from wireviz import APP_NAME, __version__, wireviz, wv_deps
 
 dir = script_path.parent.parent.parent
 readme = "readme.md"
@@ -40,6 +40,7 @@ extensions_containing_graphviz_output = [".png", ".svg", ".html"]
 generated_extensions = (
     extensions_not_containing_graphviz_output + extensions_containing_graphviz_output
 )
+build_formats = ("gv", "html", "png", "svg", "tsv")
 
 
 def collect_filenames(description, groupkey, ext_list):
@@ -51,7 +52,7 @@ def collect_filenames(description, groupkey, ext_list):
     return sorted([filename for pattern in patterns for filename in path.glob(pattern)])
 
 
-def build_generated(groupkeys):
+def build_generated(groupkeys, incremental=False):
     for key in groupkeys:
         # preparation
         path = groups[key]["path"]
@@ -64,7 +65,24 @@ def build_generated(groupkeys):
         # collect and iterate input YAML files
         for yaml_file in collect_filenames("Building", key, input_extensions):
             print(f'  "{yaml_file}"')
-            wireviz.parse(yaml_file, output_formats=("gv", "html", "png", "svg", "tsv"))
+            output_file = yaml_file.with_suffix("")
+            if incremental and wv_deps.is_up_to_date(
+                output_file, build_formats, [yaml_file]
+            ):
+                print("    up to date, skipped")
+            else:
+                harness = wireviz.parse(
+                    yaml_file, output_formats=build_formats, return_types="harness"
+                )
+                if incremental:
+                    wv_deps.write_depfile(
+                        output_file,
+                        build_formats,
+                        [yaml_file],
+                        wv_deps.harness_dependencies(
+                            harness, [yaml_file], output_file, build_formats
+                        ),
+                    )
 
             if build_readme:
                 i = "".join(filter(str.isdigit, yaml_file.stem))
@@ -95,7 +113,9 @@ def build_generated(groupkeys):
 def clean_generated(groupkeys):
     for key in groupkeys:
         # collect and remove files
-        for filename in collect_filenames("Cleaning", key, generated_extensions):
+        for filename in collect_filenames(
+            "Cleaning", key, generated_extensions + [wv_deps.DEPS_SUFFIX]
+        ):
             if filename.is_file():
                 print(f'  rm "{filename}"')
                 Path(filename).unlink()
@@ -160,6 +180,12 @@ def parse_args():
         action="store_true",
         help="the Graphviz output is also compared (default: False)",
     )
+    parser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="only build files whose inputs changed since the last incremental build (default: False)",
+    )
     parser.add_argument(
         "-b",
         "--branch",
@@ -181,7 +207,7 @@ def parse_args():
 def main():
     args = parse_args()
     if args.action == "build":
-        build_generated(args.groups)
+        build_generated(args.groups, args.incremental)
     elif args.action == "clean":
         clean_generated(args.groups)
     elif args.action == "compare" or args.action == "diff":
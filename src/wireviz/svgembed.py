@@ -2,19 +2,93 @@
 
 import base64
 import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Union
+from typing import Tuple, Union
 
 mime_subtype_replacements = {"jpg": "jpeg", "tif": "tiff"}
 
+DEFAULT_IMAGE_CACHE_SIZE = 64 * 1024 * 1024  # bytes of Base64-encoded data
 
-# TODO: Share cache and code between data_URI_base64() and embed_svg_images()
-def data_URI_base64(file: Union[str, Path], media: str = "image") -> str:
-    """Return Base64-encoded data URI of input file."""
-    file = Path(file)
-    b64 = base64.b64encode(file.read_bytes()).decode("utf-8")
-    uri = f"data:{media}/{get_mime_subtype(file)};base64, {b64}"
-    # print(f"data_URI_base64('{file}', '{media}') -> {len(uri)}-character URI")
+
+class Base64Cache:
+    """Process-wide cache of Base64-encoded image files.
+
+    Entries are keyed on the resolved file path, modification time and size,
+    so a changed file is encoded again. When the total size of the cached data
+    exceeds max_size, the least recently used entries are evicted.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_IMAGE_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self._entries: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encoded(self, file: Union[str, Path]) -> str:
+        """Return the Base64-encoded content of file."""
+        file = Path(file).resolve()
+        st = file.stat()
+        key = (str(file), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            b64 = self._entries.get(key)
+            if b64 is not None:
+                self._entries.move_to_end(key)
+                return b64
+        b64 = base64.b64encode(file.read_bytes()).decode("utf-8")
+        if len(b64) <= self.max_size:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = b64
+                    self.size += len(b64)
+                self.evict()
+        return b64
+
+    def evict(self) -> None:
+        while self.size > self.max_size:
+            _, b64 = self._entries.popitem(last=False)
+            self.size -= len(b64)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+image_cache = Base64Cache()
+
+
+def set_image_cache_size(max_size: int) -> None:
+    """Limit the memory used by the Base64 image cache to about max_size bytes."""
+    with image_cache._lock:
+        image_cache.max_size = max_size
+        image_cache.evict()
+
+
+def data_URI_base64(
+    file: Union[str, Path], media: str = "image", cache: bool = True
+) -> str:
+    """Return Base64-encoded data URI of input file.
+
+    Use cache=False for files that are only embedded once, e.g. generated diagrams,
+    to keep them from evicting images that are embedded repeatedly.
+    """
+    if cache:
+        b64 = image_cache.encoded(file)
+    else:
+        b64 = base64.b64encode(Path(file).read_bytes()).decode("utf-8")
+    return _data_URI(b64, get_mime_subtype(file), media)
+
+
+def data_URI_base64_bytes(data: bytes, mime_subtype: str, media: str = "image") -> str:
+    """Return Base64-encoded data URI of input data."""
+    return _data_URI(base64.b64encode(data).decode("utf-8"), mime_subtype, media)
+
+
+def _data_URI(b64: str, mime_subtype: str, media: str) -> str:
+    uri = f"data:{media}/{mime_subtype};base64, {b64}"
+    # print(f"data_URI_base64({len(b64)} Base64 characters, '{media}') -> {len(uri)}-character URI")
     if len(uri) > 65535:
         print(
             "data_URI_base64(): Warning: Browsers might have different URI length limitations"
@@ -23,17 +97,15 @@ def data_URI_base64(file: Union[str, Path], media: str = "image") -> str:
 
 
 def embed_svg_images(svg_in: str, base_path: Union[str, Path] = Path.cwd()) -> str:
-    images_b64 = {}  # cache of base64-encoded images
+    images_b64 = {}  # base64-encoded images, by URL as used in this SVG
 
     def image_tag(pre: str, url: str, post: str) -> str:
         return f'<image{pre} xlink:href="{url}"{post}>'
 
     def replace(match: re.Match) -> str:
         imgurl = match["URL"]
-        if not imgurl in images_b64:  # only encode/cache every unique URL once
-            imgurl_abs = (Path(base_path) / imgurl).resolve()
-            image = imgurl_abs.read_bytes()
-            images_b64[imgurl] = base64.b64encode(image).decode("utf-8")
+        if not imgurl in images_b64:  # only look up every unique URL once
+            images_b64[imgurl] = image_cache.encoded(Path(base_path) / imgurl)
         return image_tag(
             match["PRE"] or "",
             f"data:image/{get_mime_subtype(imgurl)};base64, {images_b64[imgurl]}",
@@ -11,15 +11,15 @@ import yaml
 if __name__ == "__main__":
     sys.path.insert(0, str(Path(__file__).parent.parent))  # add src/wireviz to PATH
 
-from wireviz.DataClasses import Metadata, Options, Tweak
+from wireviz.DataClasses import Designator, Metadata, Options, Pin, Tweak
 from wireviz.Harness import Harness
 from wireviz.wv_helper import (
     expand,
     file_read_text,
-    get_single_key_and_value,
     is_arrow,
     smart_file_resolve,
 )
+from wireviz.wv_profile import Profiler, set_profiler, span
 
 from . import APP_NAME
 
@@ -30,7 +30,8 @@ def parse(
     output_formats: Union[None, str, Tuple[str]] = None,
     output_dir: Union[str, Path] = None,
     output_name: Union[None, str] = None,
-    image_paths: Union[Path, str, List] = [],
+    image_paths: Union[Path, str, List, None] = None,
+    profile: Union[None, Profiler, Path, str] = None,
 ) -> Any:
     """
     This function takes an input, parses it as a WireViz Harness file,
@@ -42,9 +43,14 @@ def parse(
         * A Python Dict containing the pre-parsed YAML data
 
     Supported return types:
+        * "csv":     the BOM, as comma-separated text
+        * "gv":      the diagram, as GraphViz source
+        * "html":    the diagram and (depending on the template) the BOM, as HTML text
         * "png":     the diagram as raw PNG data
         * "svg":     the diagram as raw SVG data
+        * "tsv":     the BOM, as tab-separated text
         * "harness": the diagram as a Harness Python object
+    All return types except "harness" are generated in memory without using any files.
 
     Supported output formats:
         * "csv":  the BOM, as a comma-separated text file
@@ -75,19 +81,102 @@ def parse(
             Paths to use when resolving any image paths included in the data.
             Note: If inp is a path to a YAML file,
             its parent directory will automatically be included in the list.
+        profile (Profiler | Path | str, optional):
+            A wv_profile.Profiler to record the time spent in each processing stage in,
+            or the name of a file to write these times to as Chrome trace event JSON.
 
     Returns:
         Depending on the return_types parameter, may return:
         * None
         * one of the following, or a tuple containing two or more of the following:
-            * PNG data
-            * SVG data
+            * PNG data (bytes)
+            * CSV, GraphViz, HTML, SVG or TSV data (str)
             * a Harness object
     """
 
     if not output_formats and not return_types:
         raise Exception("No output formats or return types specified")
 
+    if profile is None:
+        return _parse(
+            inp, return_types, output_formats, output_dir, output_name, image_paths
+        )
+
+    profiler = profile if isinstance(profile, Profiler) else Profiler()
+    previous_profiler = set_profiler(profiler)
+    try:
+        return _parse(
+            inp, return_types, output_formats, output_dir, output_name, image_paths
+        )
+    finally:
+        set_profiler(previous_profiler)
+        if profiler is not profile:
+            profiler.write_trace(profile)
+
+
+def _parse(
+    inp: Union[Path, str, Dict],
+    return_types: Union[None, str, Tuple[str]],
+    output_formats: Union[None, str, Tuple[str]],
+    output_dir: Union[str, Path, None],
+    output_name: Union[None, str],
+    image_paths: Union[Path, str, List, None],
+) -> Any:
+    with span("parse"):
+        harness, output_file = _parse_harness(
+            inp, output_formats, output_dir, output_name, image_paths
+        )
+
+        if output_formats:
+            with span("output", formats=",".join(output_formats)):
+                harness.output(filename=output_file, fmt=output_formats, view=False)
+
+        if return_types:
+            return_types = _get_return_types(return_types)
+            return_formats = _get_return_formats(return_types)
+            outputs = {}
+            if return_formats:
+                # generate all requested formats together, to render the diagram only once per format
+                with span("render_outputs", formats=",".join(return_formats)):
+                    outputs = harness.render_outputs(return_formats, output_file)
+            return _get_returns(harness, return_types, outputs)
+
+
+async def parse_async(
+    inp: Union[Path, str, Dict],
+    return_types: Union[str, Tuple[str]],
+    output_name: Union[None, str] = None,
+    image_paths: Union[Path, str, List, None] = None,
+) -> Any:
+    """
+    This function works like parse() with return types only (no output files),
+    but runs GraphViz as asynchronous subprocesses to avoid blocking the event loop.
+    The number of concurrent GraphViz processes is limited as set by
+    wv_render.set_async_concurrency().
+
+    See parse() for the supported inputs, return types and return values.
+    """
+    harness, output_file = _parse_harness(inp, None, None, output_name, image_paths)
+    return_types = _get_return_types(return_types)
+    return_formats = _get_return_formats(return_types)
+    outputs = {}
+    if return_formats:
+        outputs = await harness.render_outputs_async(return_formats, output_file)
+    return _get_returns(harness, return_types, outputs)
+
+
+def _parse_harness(
+    inp: Union[Path, str, Dict],
+    output_formats: Union[None, str, Tuple[str]],
+    output_dir: Union[str, Path, None],
+    output_name: Union[None, str],
+    image_paths: Union[Path, str, List, None],
+) -> Tuple[Harness, Union[Path, None]]:
+    """
+    Parse the input into a Harness object.
+    Return the Harness object and the output file path (without extension),
+    which is None if it cannot be determined and is not needed.
+    """
     yaml_data, yaml_file = _get_yaml_data_and_path(inp)
     if not isinstance(yaml_data, dict):
         raise TypeError(
@@ -98,7 +187,16 @@ def parse(
         output_dir = _get_output_dir(yaml_file, output_dir)
         output_name = _get_output_name(yaml_file, output_name)
         output_file = output_dir / output_name
+    elif yaml_file:
+        output_file = yaml_file.with_suffix("")
+    else:
+        output_file = None
 
+    # copy into a new list, to not add to the caller's list below
+    if isinstance(image_paths, (str, Path)):
+        image_paths = [image_paths]
+    else:
+        image_paths = list(image_paths or [])
     if yaml_file:
         # if reading from file, ensure that input file's parent directory is included in image_paths
         default_image_path = yaml_file.parent.resolve()
@@ -208,159 +306,163 @@ def parse(
         nonlocal expected_type
         expected_type = alternating_types[1 - alternating_types.index(expected_type)]
 
-    for connection_set in connection_sets:
-        # figure out number of parallel connections within this set
-        connectioncount = []
-        for entry in connection_set:
-            if isinstance(entry, list):
-                connectioncount.append(len(entry))
-            elif isinstance(entry, dict):
-                connectioncount.append(len(expand(list(entry.values())[0])))
-                # e.g.: - X1: [1-4,6] yields 5
-            else:
-                pass  # strings do not reveal connectioncount
-        if not any(connectioncount):
-            # no item in the list revealed connection count;
-            # assume connection count is 1
-            connectioncount = [1]
-            # Example: The following is a valid connection set,
-            #          even though no item reveals the connection count;
-            #          the count is not needed because only a component-level mate happens.
-            # -
-            #   - CONNECTOR
-            #   - ==>
-            #   - CONNECTOR
-
-        # check that all entries are the same length
-        if len(set(connectioncount)) > 1:
-            raise Exception(
-                "All items in connection set must reference the same number of connections"
-            )
-        # all entries are the same length, connection count is set
-        connectioncount = connectioncount[0]
-
-        # expand string entries to list entries of correct length
-        for index, entry in enumerate(connection_set):
-            if isinstance(entry, str):
-                connection_set[index] = [entry] * connectioncount
-
-        # resolve all designators
-        for index, entry in enumerate(connection_set):
-            if isinstance(entry, list):
-                for subindex, item in enumerate(entry):
+    with span("connection sets", count=len(connection_sets)):
+        for connection_set in connection_sets:
+            # parse each entry into a designator and a pin list,
+            # e.g.: - X1: [1-4,6] yields ("X1", [1, 2, 3, 4, 6])
+            # or into a list of designators, e.g.: - [F1, F2] or - W1
+            entries: List[
+                Union[Tuple[Designator, List[Pin]], List[Designator], str]
+            ] = []
+            connectioncount = []
+            for entry in connection_set:
+                if isinstance(entry, list):
+                    entries.append(entry)
+                    connectioncount.append(len(entry))
+                elif isinstance(entry, dict):
+                    key = list(entry.keys())[0]
+                    pinlist = expand(entry[key])
+                    entries.append((key, pinlist))
+                    connectioncount.append(len(pinlist))
+                else:
+                    entries.append(entry)  # strings do not reveal connectioncount
+            if not any(connectioncount):
+                # no item in the list revealed connection count;
+                # assume connection count is 1
+                connectioncount = [1]
+                # Example: The following is a valid connection set,
+                #          even though no item reveals the connection count;
+                #          the count is not needed because only a component-level mate happens.
+                # -
+                #   - CONNECTOR
+                #   - ==>
+                #   - CONNECTOR
+
+            # check that all entries are the same length
+            if len(set(connectioncount)) > 1:
+                raise Exception(
+                    "All items in connection set must reference the same number of connections"
+                )
+            # all entries are the same length, connection count is set
+            connectioncount = connectioncount[0]
+
+            # resolve all designators, and store each entry as a column
+            # of designators and a column of pins with one item per connection;
+            # string entries are expanded to lists of the correct length
+            # (and resolved once per connection, generating a new instance each time)
+            designator_columns: List[List[Designator]] = []
+            pin_columns: List[List[Pin]] = []
+            for entry in entries:
+                if isinstance(entry, tuple):
+                    key, pinlist = entry
                     template, designator = resolve_designator(
-                        item, template_separator_char
+                        key, template_separator_char
                     )
-                    connection_set[index][subindex] = designator
-            elif isinstance(entry, dict):
-                key = list(entry.keys())[0]
-                template, designator = resolve_designator(key, template_separator_char)
-                value = entry[key]
-                connection_set[index] = {designator: value}
-            else:
-                pass  # string entries have been expanded in previous step
-
-        # expand all pin lists
-        for index, entry in enumerate(connection_set):
-            if isinstance(entry, list):
-                connection_set[index] = [{designator: 1} for designator in entry]
-            elif isinstance(entry, dict):
-                designator = list(entry.keys())[0]
-                pinlist = expand(entry[designator])
-                connection_set[index] = [{designator: pin} for pin in pinlist]
-            else:
-                pass  # string entries have been expanded in previous step
-
-        # Populate wiring harness ==============================================
-
-        expected_type = None  # reset check for alternating types
-        # at the beginning of every connection set
-        # since each set may begin with either type
-
-        # generate components
-        for entry in connection_set:
-            for item in entry:
-                designator = list(item.keys())[0]
-                template = designators_and_templates[designator]
-
-                if designator in harness.connectors:  # existing connector instance
-                    check_type(designator, template, "connector")
-                elif template in template_connectors.keys():
-                    # generate new connector instance from template
-                    check_type(designator, template, "connector")
-                    harness.add_connector(
-                        name=designator, **template_connectors[template]
-                    )
-
-                elif designator in harness.cables:  # existing cable instance
-                    check_type(designator, template, "cable/arrow")
-                elif template in template_cables.keys():
-                    # generate new cable instance from template
-                    check_type(designator, template, "cable/arrow")
-                    harness.add_cable(name=designator, **template_cables[template])
-
-                elif is_arrow(designator):
-                    check_type(designator, template, "cable/arrow")
-                    # arrows do not need to be generated here
+                    designator_columns.append([designator] * connectioncount)
+                    pin_columns.append(pinlist)
                 else:
-                    raise Exception(
-                        f"{template} is an unknown template/designator/arrow."
+                    if isinstance(entry, str):
+                        entry = [entry] * connectioncount
+                    designator_columns.append(
+                        [
+                            resolve_designator(item, template_separator_char)[1]
+                            for item in entry
+                        ]
                     )
+                    pin_columns.append([1] * connectioncount)
+
+            # Populate wiring harness ==============================================
+
+            expected_type = None  # reset check for alternating types
+            # at the beginning of every connection set
+            # since each set may begin with either type
+
+            # generate components
+            for designators in designator_columns:
+                for designator in dict.fromkeys(designators):  # unique, in order
+                    template = designators_and_templates[designator]
+
+                    if designator in harness.connectors:  # existing connector instance
+                        check_type(designator, template, "connector")
+                    elif template in template_connectors.keys():
+                        # generate new connector instance from template
+                        check_type(designator, template, "connector")
+                        harness.add_connector(
+                            name=designator, **template_connectors[template]
+                        )
 
-            alternate_type()  # entries in connection set must alternate between connectors and cables/arrows
-
-        # transpose connection set list
-        # before: one item per component, one subitem per connection in set
-        # after:  one item per connection in set, one subitem per component
-        connection_set = list(map(list, zip(*connection_set)))
-
-        # connect components
-        for index_entry, entry in enumerate(connection_set):
-            for index_item, item in enumerate(entry):
-                designator = list(item.keys())[0]
+                    elif designator in harness.cables:  # existing cable instance
+                        check_type(designator, template, "cable/arrow")
+                    elif template in template_cables.keys():
+                        # generate new cable instance from template
+                        check_type(designator, template, "cable/arrow")
+                        harness.add_cable(name=designator, **template_cables[template])
 
-                if designator in harness.cables:
-                    if index_item == 0:
-                        # list started with a cable, no connector to join on left side
-                        from_name, from_pin = (None, None)
-                    else:
-                        from_name, from_pin = get_single_key_and_value(
-                            entry[index_item - 1]
-                        )
-                    via_name, via_pin = (designator, item[designator])
-                    if index_item == len(entry) - 1:
-                        # list ends with a cable, no connector to join on right side
-                        to_name, to_pin = (None, None)
+                    elif is_arrow(designator):
+                        check_type(designator, template, "cable/arrow")
+                        # arrows do not need to be generated here
                     else:
-                        to_name, to_pin = get_single_key_and_value(
-                            entry[index_item + 1]
-                        )
-                    harness.connect(
-                        from_name, from_pin, via_name, via_pin, to_name, to_pin
-                    )
-
-                elif is_arrow(designator):
-                    if index_item == 0:  # list starts with an arrow
                         raise Exception(
-                            "An arrow cannot be at the start of a connection set"
-                        )
-                    elif index_item == len(entry) - 1:  # list ends with an arrow
-                        raise Exception(
-                            "An arrow cannot be at the end of a connection set"
+                            f"{template} is an unknown template/designator/arrow."
                         )
 
-                    from_name, from_pin = get_single_key_and_value(
-                        entry[index_item - 1]
-                    )
-                    via_name, via_pin = (designator, None)
-                    to_name, to_pin = get_single_key_and_value(entry[index_item + 1])
-                    if "-" in designator:  # mate pin by pin
-                        harness.add_mate_pin(
-                            from_name, from_pin, to_name, to_pin, designator
+                alternate_type()  # entries in connection set must alternate between connectors and cables/arrows
+
+            # connect components,
+            # one connection at a time, from left to right across the columns
+            arrows = {}  # is_arrow() result by designator
+            last_item = len(designator_columns) - 1
+            for index_entry in range(connectioncount):
+                for index_item, designators in enumerate(designator_columns):
+                    designator = designators[index_entry]
+
+                    if index_item > 0:
+                        left_name = designator_columns[index_item - 1][index_entry]
+                        left_pin = pin_columns[index_item - 1][index_entry]
+                    if index_item < last_item:
+                        right_name = designator_columns[index_item + 1][index_entry]
+                        right_pin = pin_columns[index_item + 1][index_entry]
+
+                    if designator not in harness.cables and designator not in arrows:
+                        arrows[designator] = is_arrow(designator)
+
+                    if designator in harness.cables:
+                        if index_item == 0:
+                            # list started with a cable, no connector to join on left side
+                            from_name, from_pin = (None, None)
+                        else:
+                            from_name, from_pin = (left_name, left_pin)
+                        via_name = designator
+                        via_pin = pin_columns[index_item][index_entry]
+                        if index_item == last_item:
+                            # list ends with a cable, no connector to join on right side
+                            to_name, to_pin = (None, None)
+                        else:
+                            to_name, to_pin = (right_name, right_pin)
+                        harness.connect(
+                            from_name, from_pin, via_name, via_pin, to_name, to_pin
                         )
-                    elif "=" in designator and index_entry == 0:
-                        # mate two connectors as a whole
-                        harness.add_mate_component(from_name, to_name, designator)
+
+                    elif arrows[designator]:
+                        if index_item == 0:  # list starts with an arrow
+                            raise Exception(
+                                "An arrow cannot be at the start of a connection set"
+                            )
+                        elif index_item == last_item:  # list ends with an arrow
+                            raise Exception(
+                                "An arrow cannot be at the end of a connection set"
+                            )
+
+                        from_name, from_pin = (left_name, left_pin)
+                        via_name, via_pin = (designator, None)
+                        to_name, to_pin = (right_name, right_pin)
+                        if "-" in designator:  # mate pin by pin
+                            harness.add_mate_pin(
+                                from_name, from_pin, to_name, to_pin, designator
+                            )
+                        elif "=" in designator and index_entry == 0:
+                            # mate two connectors as a whole
+                            harness.add_mate_component(from_name, to_name, designator)
 
     # warn about unused templates
 
@@ -381,25 +483,30 @@ def parse(
         for line in yaml_data["additional_bom_items"]:
             harness.add_bom_item(line)
 
-    if output_formats:
-        harness.output(filename=output_file, fmt=output_formats, view=False)
+    return harness, output_file
+
 
-    if return_types:
-        returns = []
-        if isinstance(return_types, str):  # only one return type speficied
-            return_types = [return_types]
+def _get_return_types(return_types: Union[str, Tuple[str]]) -> List[str]:
+    if isinstance(return_types, str):  # only one return type speficied
+        return_types = [return_types]
+    return [t.lower() for t in return_types]
 
-        return_types = [t.lower() for t in return_types]
 
-        for rt in return_types:
-            if rt == "png":
-                returns.append(harness.png)
-            if rt == "svg":
-                returns.append(harness.svg)
-            if rt == "harness":
-                returns.append(harness)
+def _get_return_formats(return_types: List[str]) -> Tuple[str]:
+    return tuple(rt for rt in return_types if rt != "harness")
+
+
+def _get_returns(
+    harness: Harness, return_types: List[str], outputs: Dict[str, Union[bytes, str]]
+) -> Any:
+    returns = []
+    for rt in return_types:
+        if rt in outputs:
+            returns.append(outputs[rt])
+        if rt == "harness":
+            returns.append(harness)
 
-        return tuple(returns) if len(returns) != 1 else returns[0]
+    return tuple(returns) if len(returns) != 1 else returns[0]
 
 
 def _get_yaml_data_and_path(inp: Union[str, Path, Dict]) -> (Dict, Path):
@@ -427,7 +534,8 @@ def _get_yaml_data_and_path(inp: Union[str, Path, Dict]) -> (Dict, Path):
             # file does not exist; assume inp is a YAML string
             yaml_str = inp
             yaml_path = None
-        yaml_data = yaml.safe_load(yaml_str)
+        with span("yaml.safe_load"):
+            yaml_data = yaml.safe_load(yaml_str)
     else:
         # received a Dict, use as-is
         yaml_data = inp
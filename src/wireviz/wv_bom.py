@@ -1,13 +1,13 @@
 # -*- coding: utf-8 -*-
 
-from dataclasses import asdict
+import csv
 from itertools import groupby
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, TextIO, Tuple, Union
 
 from wireviz.DataClasses import AdditionalComponent, Cable, Color, Connector
 from wireviz.wv_colors import translate_color
 from wireviz.wv_gv_html import html_bgcolor_attr, html_line_breaks
-from wireviz.wv_helper import clean_whitespace
+from wireviz.wv_helper import clean_whitespace, remove_links
 
 BOM_COLUMNS_ALWAYS = ("id", "description", "qty", "unit", "designators")
 BOM_COLUMNS_OPTIONAL = ("pn", "manufacturer", "mpn", "supplier", "spn")
@@ -17,6 +17,16 @@ HEADER_PN = "P/N"
 HEADER_MPN = "MPN"
 HEADER_SPN = "SPN"
 
+# csv.writer() arguments for each supported BOM file format
+BOM_FILE_DIALECTS = {
+    # plain tab-separated values without any quoting (whitespace is cleaned from all BOM values)
+    "tsv": dict(
+        delimiter="\t", quoting=csv.QUOTE_NONE, quotechar=None, lineterminator="\n"
+    ),
+    # comma-separated values as specified in RFC 4180
+    "csv": dict(delimiter=",", quoting=csv.QUOTE_MINIMAL, lineterminator="\r\n"),
+}
+
 BOMKey = Tuple[str, ...]
 BOMColumn = str  # = Literal[*BOM_COLUMNS_ALWAYS, *BOM_COLUMNS_OPTIONAL]
 BOMEntry = Dict[BOMColumn, Union[str, int, float, List[str], None]]
@@ -24,8 +34,8 @@ BOMEntry = Dict[BOMColumn, Union[str, int, float, List[str], None]]
 
 def optional_fields(part: Union[Connector, Cable, AdditionalComponent]) -> BOMEntry:
     """Return part field values for the optional BOM columns as a dict."""
-    part = asdict(part)
-    return {field: part.get(field) for field in BOM_COLUMNS_OPTIONAL}
+    # read the attributes directly, as dataclasses.asdict() would deep copy all fields
+    return {field: getattr(part, field, None) for field in BOM_COLUMNS_OPTIONAL}
 
 
 def get_additional_component_table(
@@ -47,9 +57,14 @@ def get_additional_component_table(
                 "bgcolor": part.bgcolor,
             }
             if harness.options.mini_bom_mode:
-                id = get_bom_index(
-                    harness.bom(),
-                    bom_entry_key({**asdict(part), "description": part.description}),
+                id = harness.bom_id(
+                    bom_entry_key(
+                        {
+                            "description": part.description,
+                            "unit": part.unit,
+                            **optional_fields(part),
+                        }
+                    )
                 )
                 rows.append(
                     component_table_entry(
@@ -197,9 +212,11 @@ def generate_bom(harness: "Harness") -> List[BOMEntry]:
     bom = []
     for _, group in groupby(sorted(bom_entries, key=bom_entry_key), key=bom_entry_key):
         group_entries = list(group)
-        designators = sum(
-            (make_list(entry.get("designators")) for entry in group_entries), []
-        )
+        designators = [
+            designator
+            for entry in group_entries
+            for designator in make_list(entry.get("designators"))
+        ]
         total_qty = sum(entry.get("qty", 1) for entry in group_entries)
         bom.append(
             {
@@ -215,14 +232,6 @@ def generate_bom(harness: "Harness") -> List[BOMEntry]:
     return [{**entry, "id": index} for index, entry in enumerate(bom, 1)]
 
 
-def get_bom_index(bom: List[BOMEntry], target: BOMKey) -> int:
-    """Return id of BOM entry or raise exception if not found."""
-    for entry in bom:
-        if bom_entry_key(entry) == target:
-            return entry["id"]
-    raise Exception("Internal error: No BOM entry found matching: " + "|".join(target))
-
-
 def bom_list(bom: List[BOMEntry]) -> List[List[str]]:
     """Return list of BOM rows as lists of column strings with headings in top row."""
     keys = list(BOM_COLUMNS_ALWAYS)  # Always include this fixed set of BOM columns.
@@ -244,6 +253,19 @@ def bom_list(bom: List[BOMEntry]) -> List[List[str]]:
     ]  # Create string list for each entry row
 
 
+def write_bom(file: TextIO, bomlist: List[List[str]], fmt: str = "tsv") -> None:
+    """Write BOM rows (see bom_list()) to an open text file in the specified format.
+
+    The file should be opened with newline="" when writing CSV.
+    """
+    writer = csv.writer(file, **BOM_FILE_DIALECTS[fmt])
+    for row in bomlist:
+        writer.writerow(
+            remove_links(", ".join(item) if isinstance(item, list) else str(item))
+            for item in row
+        )
+
+
 def component_table_entry(
     type: str,
     qty: Union[int, float],
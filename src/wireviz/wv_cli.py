@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 
+import io
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext, redirect_stdout
+from functools import partial
 from pathlib import Path
 
 import click
@@ -10,11 +14,11 @@ if __name__ == "__main__":
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 import wireviz.wireviz as wv
-from wireviz import APP_NAME, __version__
+from wireviz import APP_NAME, __version__, wv_deps, wv_profile, wv_render
 from wireviz.wv_helper import file_read_text
 
 format_codes = {
-    # "c": "csv",
+    "c": "csv",
     "g": "gv",
     "h": "html",
     "p": "png",
@@ -23,6 +27,8 @@ format_codes = {
     "t": "tsv",
 }
 
+PROFILE_FILE = "wireviz-profile.json"
+
 epilog = "The -f or --format option accepts a string containing one or more of the "
 epilog += "following characters to specify which file types to output:\n"
 epilog += ", ".join([f"{key} ({value.upper()})" for key, value in format_codes.items()])
@@ -64,6 +70,47 @@ epilog += ", ".join([f"{key} ({value.upper()})" for key, value in format_codes.i
     type=str,
     help="File name (without extension) to use for output files, if different from input file name.",
 )
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    type=click.IntRange(min=0),
+    show_default=True,
+    help="Number of input files to process in parallel (0 = one per CPU core).",
+)
+@click.option(
+    "-i",
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="Only process input files whose outputs are missing or out of date, tracked in a .deps.json file per output.",
+)
+@click.option(
+    "--cache-dir",
+    default=None,
+    type=Path,
+    help="Directory to cache rendered diagrams in, to avoid re-running Graphviz for unchanged diagrams (optional).",
+)
+@click.option(
+    "--cache-size",
+    default=wv_render.DEFAULT_CACHE_SIZE // 2**20,
+    type=click.IntRange(min=0),
+    show_default=True,
+    help="Maximum size of the render cache in MiB; least recently used diagrams are evicted first.",
+)
+@click.option(
+    "--graphviz-workers",
+    default=0,
+    type=click.IntRange(min=0),
+    show_default=True,
+    help="Number of long-lived Graphviz processes per output format (and per parallel job) to render with, instead of starting Graphviz for each diagram (0 = disabled). Only used when a single output format is rendered, since each worker lays out the diagram again for its format.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help=f"Record the time spent in each processing stage of each file, write it to {PROFILE_FILE} as Chrome trace event JSON, and print a summary.",
+)
 @click.option(
     "-V",
     "--version",
@@ -71,7 +118,20 @@ epilog += ", ".join([f"{key} ({value.upper()})" for key, value in format_codes.i
     default=False,
     help=f"Output {APP_NAME} version and exit.",
 )
-def wireviz(file, format, prepend, output_dir, output_name, version):
+def wireviz(
+    file,
+    format,
+    prepend,
+    output_dir,
+    output_name,
+    jobs,
+    incremental,
+    cache_dir,
+    cache_size,
+    graphviz_workers,
+    profile,
+    version,
+):
     """
     Parses the provided FILE and generates the specified outputs.
     """
@@ -115,38 +175,210 @@ def wireviz(file, format, prepend, output_dir, output_name, version):
     else:
         prepend_input = ""
 
-    # run WireVIz on each input file
+    # check all input files before starting any work
     for file in filepaths:
-        file = Path(file)
-        if not file.exists():
+        if not Path(file).exists():
             raise Exception(f"File does not exist:\n{file}")
 
-        # file_out = file.with_suffix("") if not output_file else output_file
-        _output_dir = file.parent if not output_dir else output_dir
-        _output_name = file.stem if not output_name else output_name
+    # settings shared by all input files
+    run_args = dict(
+        output_formats=output_formats,
+        output_dir=output_dir,
+        output_name=output_name,
+        prepend=list(prepend),
+        prepend_input=prepend_input,
+        incremental=incremental,
+    )
+    cache_args = (cache_dir, cache_size * 2**20)
+    cache = wv_render.set_render_cache(*cache_args)
+    wv_render.set_worker_pool(graphviz_workers)
+    profiler = wv_profile.Profiler() if profile else None
+    wv_profile.set_profiler(profiler)
+
+    if jobs == 1:
+        # run WireViz on each input file, stop at the first error
+        skipped = 0
+        for file in filepaths:
+            _print_file_names(file, output_formats_str, **run_args)
+            with wv_profile.span("file", file=file):
+                skipped += not _parse_file(file, **run_args)
+        print()
+        _print_summary(len(filepaths), skipped, [], incremental)
+        if cache:
+            _print_cache_stats(*cache.stats())
+        if profiler:
+            _print_profile(profiler)
+        print()
+        return
 
-        print("Input file:  ", file)
-        print(
-            "Output file: ", f"{Path(_output_dir / _output_name)}.{output_formats_str}"
+    # run WireViz on the input files in parallel, isolating errors to the file
+    # causing them; the prepend input is read once above and shared with all workers.
+    # With a single job, e.g. for a single input file, the files are processed
+    # in this process, with the same error handling and summary.
+    jobs = min(jobs or os.cpu_count() or 1, len(filepaths))
+    if jobs > 1:
+        print(f"Processing {len(filepaths)} files using {jobs} parallel jobs")
+        executor = ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(cache_args, graphviz_workers, profile, run_args),
         )
+    else:
+        executor = nullcontext()
+    with executor:
+        if jobs > 1:
+            results = [
+                executor.submit(_parse_file_in_worker, file).result
+                for file in filepaths
+            ]
+        else:
+            results = [partial(_parse_file_here, file, run_args) for file in filepaths]
+        # collect results in input order to get deterministic output and summary
+        errors = []
+        skipped = 0
+        cache_hits, cache_misses = 0, 0
+        for file, result in zip(filepaths, results):
+            _print_file_names(file, output_formats_str, **run_args)
+            try:
+                built, hits, misses, events, output = result()
+                print(output, end="")
+                skipped += not built
+                cache_hits += hits
+                cache_misses += misses
+                if profiler:
+                    profiler.extend(events)
+            except Exception as e:  # isolate errors to the file causing them
+                errors.append((file, e))
+
+    print()
+    _print_summary(len(filepaths), skipped, errors, incremental)
+    if cache:
+        if jobs == 1:  # counted in this process
+            cache_hits, cache_misses = cache.stats()
+        _print_cache_stats(cache_hits, cache_misses)
+    if profiler:
+        _print_profile(profiler)
+    print()
+    if errors:
+        sys.exit(1)
+
+
+def _print_summary(count, skipped, errors, incremental) -> None:
+    print(
+        f"Processed {count} files: {count - len(errors)} OK"
+        + (f" ({skipped} up to date)" if incremental else "")
+        + f", {len(errors)} failed"
+    )
+    for file, e in errors:
+        print(f"  {file}: {type(e).__name__}: {e}")
 
-        yaml_input = file_read_text(file)
-        file_dir = file.parent
 
-        yaml_input = prepend_input + yaml_input
-        image_paths = {file_dir}
-        for p in prepend:
-            image_paths.add(Path(p).parent)
+def _print_file_names(file, output_formats_str, output_dir, output_name, **_) -> None:
+    file = Path(file)
+    _output_dir = file.parent if not output_dir else output_dir
+    _output_name = file.stem if not output_name else output_name
+    print("Input file:  ", file)
+    print("Output file: ", f"{Path(_output_dir / _output_name)}.{output_formats_str}")
 
-        wv.parse(
-            yaml_input,
-            output_formats=output_formats,
-            output_dir=_output_dir,
-            output_name=_output_name,
-            image_paths=list(image_paths),
+
+def _parse_file(
+    file,
+    output_formats,
+    output_dir,
+    output_name,
+    prepend,
+    prepend_input,
+    incremental,
+) -> bool:
+    """Parse file and generate the outputs. Return False if skipped because up to date."""
+    file = Path(file)
+    _output_dir = file.parent if not output_dir else output_dir
+    _output_name = file.stem if not output_name else output_name
+    output_file = Path(_output_dir) / _output_name
+    input_files = prepend + [file]
+
+    if incremental and wv_deps.is_up_to_date(output_file, output_formats, input_files):
+        print("Up to date, skipped:", file)
+        return False
+
+    yaml_input = file_read_text(file)
+    file_dir = file.parent
+
+    yaml_input = prepend_input + yaml_input
+    image_paths = {file_dir}
+    for p in prepend:
+        image_paths.add(Path(p).parent)
+
+    harness = wv.parse(
+        yaml_input,
+        return_types="harness",
+        output_formats=output_formats,
+        output_dir=_output_dir,
+        output_name=_output_name,
+        image_paths=list(image_paths),
+    )
+
+    if incremental:
+        wv_deps.write_depfile(
+            output_file,
+            output_formats,
+            input_files,
+            wv_deps.harness_dependencies(
+                harness, input_files, output_file, output_formats
+            ),
         )
+    return True
+
+
+# settings shared by all files processed in a worker process,
+# set once per process by _init_worker()
+_worker_args = None
+_worker_profile = False
+
+
+def _init_worker(cache_args, graphviz_workers, profile, run_args) -> None:
+    global _worker_args, _worker_profile
+    _worker_args = run_args
+    _worker_profile = profile
+    wv_render.set_render_cache(*cache_args)
+    wv_render.set_worker_pool(graphviz_workers)
+
+
+def _parse_file_in_worker(file) -> (bool, int, int, list, str):
+    """Parse file and return whether it was built, the number of render cache hits
+    and misses, the profiler events recorded (if profiling), and the printed output,
+    to be printed by the main process in input order."""
+    cache = wv_render.render_cache
+    hits, misses = cache.stats() if cache else (0, 0)
+    profiler = wv_profile.Profiler() if _worker_profile else None
+    wv_profile.set_profiler(profiler)
+    with redirect_stdout(io.StringIO()) as output:
+        with wv_profile.span("file", file=file):
+            built = _parse_file(file, **_worker_args)
+    events = profiler.events if profiler else []
+    if cache:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    return built, hits, misses, events, output.getvalue()
+
+
+def _parse_file_here(file, run_args) -> (bool, int, int, list, str):
+    """Parse file in this process, returning the same results as
+    _parse_file_in_worker(), with the output already printed and the profiler
+    events and render cache stats already recorded in this process."""
+    with wv_profile.span("file", file=file):
+        built = _parse_file(file, **run_args)
+    return built, 0, 0, [], ""
+
+
+def _print_cache_stats(hits, misses) -> None:
+    print(f"Render cache: {hits} hits, {misses} misses")
+
 
+def _print_profile(profiler) -> None:
+    profiler.write_trace(PROFILE_FILE)
     print()
+    print(profiler.summary())
+    print("Profile written to:", PROFILE_FILE)
 
 
 if __name__ == "__main__":
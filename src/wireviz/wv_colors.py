@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Tuple
 
 COLOR_CODES = {
     # fmt: off
@@ -118,6 +119,11 @@ color_default = "#ffffff"
 
 _hex_digits = set("0123456789abcdefABCDEF")
 
+# reverse lookup of color names, the first name wins for duplicate hex colors
+_hex_color = {}
+for _name, _hex in _color_hex.items():
+    _hex_color.setdefault(_hex, _name)
+
 
 # Literal type aliases below are commented to avoid requiring python 3.8
 Color = str  # Two-letter color name = Literal[_color_hex.keys()]
@@ -130,8 +136,15 @@ ColorScheme = str  # Color scheme name = Literal[COLOR_CODES.keys()]
 
 def get_color_hex(input: Colors, pad: bool = False) -> List[str]:
     """Return list of hex colors from either a string of color names or :-separated hex colors."""
+    return list(_get_color_hex(input, pad))
+
+
+# Color lookups are repeated for every wire, pin and edge, with few distinct inputs.
+# Warnings about invalid colors are therefore only printed once for each input.
+@lru_cache(maxsize=1024)
+def _get_color_hex(input: Colors, pad: bool) -> Tuple[str, ...]:
     if input is None or input == "":
-        return [color_default]
+        return (color_default,)
     elif input[0] == "#":  # Hex color(s)
         output = input.split(":")
         for i, c in enumerate(output):
@@ -158,16 +171,15 @@ def get_color_hex(input: Colors, pad: bool = False) -> List[str]:
     elif pad and len(output) == 1:  # Hacky style fix: Give single color wires
         output *= 3  #              a triple-up so that wires are the same size
 
-    return output
+    return tuple(output)
 
 
 def get_color_translation(translate: Dict[Color, str], input: Colors) -> List[str]:
     """Return list of colors translations from either a string of color names or :-separated hex colors."""
 
     def from_hex(hex_input: str) -> str:
-        for color, hex in _color_hex.items():
-            if hex == hex_input:
-                return translate[color]
+        if hex_input in _hex_color:
+            return translate[_hex_color[hex_input]]
         return f'({",".join(str(int(hex_input[i:i+2], 16)) for i in range(1, 6, 2))})'
 
     return (
@@ -177,6 +189,7 @@ def get_color_translation(translate: Dict[Color, str], input: Colors) -> List[st
     )
 
 
+@lru_cache(maxsize=1024)
 def translate_color(input: Colors, color_mode: ColorMode) -> str:
     if input == "" or input is None:
         return ""
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from wireviz import __version__
+from wireviz.wv_html import get_template_candidates, get_template_file
+
+DEPS_SUFFIX = ".deps.json"
+
+# file name suffix of each output format, when different from ".{format}"
+output_suffixes = {
+    "csv": ".bom.csv",
+    "tsv": ".bom.tsv",
+}
+
+FileState = Dict[str, Union[int, str]]
+
+
+def output_files(
+    output_file: Union[str, Path], output_formats: Iterable[str]
+) -> List[Path]:
+    """Return the paths of all files generated for the output formats."""
+    return [
+        Path(f"{output_file}{output_suffixes.get(fmt, '.' + fmt)}")
+        for fmt in output_formats
+    ]
+
+
+def depfile_path(output_file: Union[str, Path]) -> Path:
+    return Path(f"{output_file}{DEPS_SUFFIX}")
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_state(path: Path) -> FileState:
+    st = path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": file_hash(path)}
+
+
+def is_unchanged(path: Path, state: Optional[FileState]) -> bool:
+    """Return True if the file content still matches the recorded state,
+    or if the file still does not exist when its state is None.
+
+    When only the mtime changed, the recorded mtime is updated in state,
+    to not hash the file again next time."""
+    try:
+        st = path.stat()
+    except OSError:
+        return state is None
+    if state is None or st.st_size != state["size"]:
+        return False
+    if st.st_mtime_ns == state["mtime_ns"]:
+        return True  # assume unchanged content when size and mtime are unchanged
+    if file_hash(path) != state["sha256"]:
+        return False
+    state["mtime_ns"] = st.st_mtime_ns
+    return True
+
+
+def harness_dependencies(
+    harness: "Harness",
+    input_files: Iterable[Union[str, Path]],
+    output_file: Union[str, Path],
+    output_formats: Iterable[str],
+) -> List[Path]:
+    """Return all files that the outputs generated from the harness depend on.
+
+    This includes the locations of higher precedence than the HTML template used,
+    where adding a template file would change the output.
+    """
+    deps = [Path(f) for f in input_files]
+    for component in list(harness.connectors.values()) + list(harness.cables.values()):
+        if component.image:  # image paths were resolved when parsing the input
+            deps.append(Path(component.image.src))
+    if "html" in output_formats:
+        templatefile = get_template_file(output_file, harness.metadata).resolve()
+        for candidate in get_template_candidates(output_file, harness.metadata):
+            deps.append(candidate)
+            if candidate == templatefile:
+                break
+        else:
+            deps.append(templatefile)
+    return deps
+
+
+def write_depfile(
+    output_file: Union[str, Path],
+    output_formats: Iterable[str],
+    input_files: Iterable[Union[str, Path]],
+    dependencies: Iterable[Union[str, Path]],
+) -> None:
+    """Record the direct input files and the state of all dependencies of the output
+    files, with a state of None for dependencies that do not exist."""
+    data = {
+        "version": __version__,
+        "formats": sorted(output_formats),
+        "sources": [str(Path(f).resolve()) for f in input_files],
+        "inputs": {
+            str(Path(dep).resolve()): (
+                file_state(Path(dep)) if Path(dep).exists() else None
+            )
+            for dep in dependencies
+        },
+    }
+    _write_depfile_data(output_file, data)
+
+
+def _write_depfile_data(output_file: Union[str, Path], data: dict) -> None:
+    depfile_path(output_file).write_text(json.dumps(data, indent=1), encoding="utf-8")
+
+
+def is_up_to_date(
+    output_file: Union[str, Path],
+    output_formats: Iterable[str],
+    input_files: Iterable[Union[str, Path]],
+) -> bool:
+    """Return True if all output files exist and none of their dependencies changed
+    since the dependency file was written.
+
+    input_files are the files known to be read directly (YAML and prepend files);
+    other dependencies (images and templates) are taken from the dependency file.
+    Recorded mtimes of files touched without changing their content are updated.
+    """
+    try:
+        data = json.loads(depfile_path(output_file).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    if data.get("version") != __version__:
+        return False
+    if not set(output_formats) <= set(data.get("formats", [])):
+        return False
+    if not all(f.exists() for f in output_files(output_file, output_formats)):
+        return False
+    if data.get("sources") != [str(Path(f).resolve()) for f in input_files]:
+        return False  # different direct inputs, e.g. another set of prepend files
+    inputs: Dict[str, Optional[FileState]] = data.get("inputs", {})
+    mtimes = [state and state["mtime_ns"] for state in inputs.values()]
+    if not all(is_unchanged(Path(path), state) for path, state in inputs.items()):
+        return False
+    if mtimes != [state and state["mtime_ns"] for state in inputs.values()]:
+        _write_depfile_data(output_file, data)
+    return True
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+import graphviz
+
+# quoting rules as used by the graphviz package,
+# see https://www.graphviz.org/doc/info/lang.html
+HTML_STRING = re.compile(r"<.*>$", re.DOTALL)
+ID = re.compile(r"([a-zA-Z_][a-zA-Z0-9_]*|-?(\.[0-9]+|[0-9]+(\.[0-9]*)?))$")
+KEYWORDS = {"node", "edge", "graph", "digraph", "subgraph", "strict"}
+UNESCAPED_QUOTE = re.compile(r'(?P<escaped_backslashes>(?:\\{2})*)\\?(?P<quote>")')
+ESCAPED_QUOTE = r"\g<escaped_backslashes>\\\g<quote>"
+
+
+def quote(identifier: str) -> str:
+    """Return the string as DOT identifier, quoted if needed."""
+    if identifier[:1] == "<" and HTML_STRING.match(identifier):
+        return identifier  # HTML-like labels are unique, not worth caching
+    return _quote(identifier)
+
+
+# node names, ports and attribute values are repeated many times
+@lru_cache(maxsize=4096)
+def _quote(identifier: str) -> str:
+    if not ID.match(identifier) or identifier.lower() in KEYWORDS:
+        return f'"{UNESCAPED_QUOTE.sub(ESCAPED_QUOTE, identifier)}"'
+    return identifier
+
+
+@lru_cache(maxsize=4096)
+def quote_edge(identifier: str) -> str:
+    """Return the node[:port[:compass]] string as DOT edge end, quoted if needed."""
+    node, _, rest = identifier.partition(":")
+    parts = [quote(node)]
+    if rest:
+        port, _, compass = rest.partition(":")
+        parts.append(quote(port))
+        if compass:
+            parts.append(compass)
+    return ":".join(parts)
+
+
+def attr_list(label: Optional[str], attrs: dict) -> str:
+    """Return the DOT attribute list of the label and the other attributes
+    that are not None, in the same order as the graphviz package."""
+    items = [f"label={quote(label)}"] if label is not None else []
+    items.extend(
+        f"{quote(key)}={quote(value)}"
+        for key, value in sorted(attrs.items())
+        if value is not None
+    )
+    return f" [{' '.join(items)}]" if items else ""
+
+
+class DotGraph:
+    """Undirected graph written directly as DOT source, one statement per body entry.
+
+    Compatible with the parts of graphviz.Graph used by WireViz (body, source,
+    encoding and save()) and with its basic pipe() and render() methods, but without
+    its per-call overhead, and the source can be written to a file or to Graphviz
+    part by part with lines().
+    The number of nodes, edges and HTML label ports added are counted to
+    estimate the layout time.
+    """
+
+    encoding = "utf-8"
+    format = "pdf"  # default output format, as for graphviz.Graph
+
+    def __init__(self) -> None:
+        self.body: List[str] = []
+        self.nodes = 0
+        self.edges = 0
+        self.ports = 0
+
+    def attr(self, kw: str, **attrs: Optional[str]) -> None:
+        """Add a graph, node or edge attribute statement, unless attrs is empty."""
+        attributes = attr_list(None, attrs)
+        if attributes:
+            self.body.append(f"\t{kw}{attributes}\n")
+
+    def node(
+        self, name: str, label: Optional[str] = None, **attrs: Optional[str]
+    ) -> None:
+        self.nodes += 1
+        if label is not None:
+            self.ports += label.count(' port="')
+        self.body.append(f"\t{quote(name)}{attr_list(label, attrs)}\n")
+
+    def edge(
+        self, tail: str, head: str, label: Optional[str] = None, **attrs: Optional[str]
+    ) -> None:
+        """Add an edge between the node[:port[:compass]] strings tail and head."""
+        self.edges += 1
+        self.body.append(
+            f"\t{quote_edge(tail)} -- {quote_edge(head)}{attr_list(label, attrs)}\n"
+        )
+
+    def lines(self) -> Iterator[str]:
+        """Yield the DOT source in parts."""
+        yield "graph {\n"
+        yield from self.body
+        yield "}\n"
+
+    @property
+    def source(self) -> str:
+        return "".join(self.lines())
+
+    def save(self, filename: Union[str, Path]) -> str:
+        """Write the DOT source to filename, and return the filename."""
+        with open(filename, "w", encoding=self.encoding) as file:
+            file.writelines(self.lines())
+        return str(filename)
+
+    def pipe(
+        self, format: Optional[str] = None, *, encoding: Optional[str] = None
+    ) -> Union[bytes, str]:
+        """Return the graph rendered in the output format, like graphviz.Graph.pipe():
+        as bytes, or decoded into a string if an encoding is given."""
+        from wireviz.wv_render import render_to_bytes  # imports this module
+
+        data = render_to_bytes(self.source, format or self.format, self.encoding)
+        return data.decode(encoding) if encoding else data
+
+    def render(
+        self,
+        filename: Union[str, Path, None] = None,
+        directory: Union[str, Path, None] = None,
+        view: bool = False,
+        cleanup: bool = False,
+        format: Optional[str] = None,
+    ) -> str:
+        """Save the DOT source to filename (Graph.gv by default) in directory, render it
+        into filename.format, and return the name of the rendered file, like
+        graphviz.Graph.render(). The source file is removed afterwards if cleanup,
+        and the rendered file is opened in the default viewer if view."""
+        from wireviz.wv_render import render_to_files  # imports this module
+
+        filepath = Path(directory or "", filename or "Graph.gv")
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        self.save(filepath)
+        outfile = f"{filepath}.{format or self.format}"
+        render_to_files(self.lines(), {format or self.format: outfile}, self.encoding)
+        if cleanup:
+            filepath.unlink()
+        if view:
+            graphviz.view(outfile)
+        return outfile
@@ -1,12 +1,75 @@
 # -*- coding: utf-8 -*-
 
 import re
-from typing import List, Optional, Union
+import threading
+from collections import OrderedDict
+from dataclasses import fields
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Hashable, List, Optional, Tuple, Union
 
 from wireviz.DataClasses import Color
 from wireviz.wv_colors import translate_color
 from wireviz.wv_helper import remove_links
 
+DEFAULT_LABEL_CACHE_ENTRIES = 4096
+
+
+class LabelCache:
+    """Process-wide cache of HTML node labels.
+
+    Components instantiated from the same template (or many identical auto-generated
+    ones) render the same label, so it is built once and reused by all harnesses.
+    Entries are keyed on everything the label depends on; when more than
+    max_entries labels are cached, the least recently used ones are evicted.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_LABEL_CACHE_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], str]) -> str:
+        """Return the cached label for key, or the label returned by build()."""
+        with self._lock:
+            label = self._entries.get(key)
+            if label is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return label
+            self.misses += 1
+        label = build()
+        with self._lock:
+            self._entries[key] = label
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return label
+
+    def stats(self) -> Tuple[int, int]:
+        """Return the number of cache hits and misses so far."""
+        return self.hits, self.misses
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+node_label_cache = LabelCache()
+
+
+def component_label_key(component: Any, exclude: Tuple[str, ...] = ()) -> str:
+    """Return a cache key of the component attributes, except the excluded ones."""
+    return repr(_field_getter(type(component), exclude)(component))
+
+
+@lru_cache(maxsize=None)
+def _field_getter(cls: type, exclude: Tuple[str, ...]) -> Callable[[Any], tuple]:
+    return attrgetter(*(f.name for f in fields(cls) if f.name not in exclude))
+
 
 def nested_html_table(
     rows: List[Union[str, List[Optional[str]], None]], table_attrs: str = ""
@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 
+import os
 import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Set, Tuple
 
 awg_equiv_table = {
     "0.09": "28",
@@ -43,20 +45,19 @@ def expand(yaml_data):
     if not isinstance(yaml_data, list):
         yaml_data = [yaml_data]
     for e in yaml_data:
+        if type(e) is int and e >= 0:  # no need to convert to str and back
+            output.append(e)
+            continue
         e = str(e)
         if "-" in e:
             a, b = e.split("-", 1)
             try:
                 a = int(a)
                 b = int(b)
-                if a < b:
-                    for x in range(a, b + 1):
-                        output.append(x)  # ascending range
-                elif a > b:
-                    for x in range(a, b - 1, -1):
-                        output.append(x)  # descending range
-                else:  # a == b
-                    output.append(a)  # range of length 1
+                if a <= b:
+                    output.extend(range(a, b + 1))  # ascending range
+                else:
+                    output.extend(range(a, b - 1, -1))  # descending range
             except:
                 # '-' was not a delimiter between two ints, pass e through unchanged
                 output.append(e)
@@ -83,6 +84,19 @@ def int2tuple(inp):
     return output
 
 
+def first_indices(inp: list) -> Tuple[Dict[Any, int], Set[Any]]:
+    """Return the index of the first occurrence of each element,
+    and the set of elements occurring more than once."""
+    indices = {}
+    duplicates = set()
+    for index, element in enumerate(inp):
+        if element in indices:
+            duplicates.add(element)
+        else:
+            indices[element] = index
+    return indices, duplicates
+
+
 def flatten2d(inp):
     return [
         [str(item) if not isinstance(item, List) else ", ".join(item) for item in row]
@@ -91,21 +105,17 @@ def flatten2d(inp):
 
 
 def tuplelist2tsv(inp, header=None):
-    output = ""
     if header is not None:
         inp.insert(0, header)
     inp = flatten2d(inp)
-    for row in inp:
-        output = output + "\t".join(str(remove_links(item)) for item in row) + "\n"
-    return output
+    return "".join("\t".join(remove_links(item) for item in row) + "\n" for row in inp)
+
+
+_link_pattern = re.compile(r"<[aA] [^>]*>([^<]*)</[aA]>")
 
 
 def remove_links(inp):
-    return (
-        re.sub(r"<[aA] [^>]*>([^<]*)</[aA]>", r"\1", inp)
-        if isinstance(inp, str)
-        else inp
-    )
+    return _link_pattern.sub(r"\1", inp) if isinstance(inp, str) else inp
 
 
 def clean_whitespace(inp):
@@ -118,9 +128,9 @@ def open_file_read(filename):
     return open(filename, "r", encoding="UTF-8")
 
 
-def open_file_write(filename):
+def open_file_write(filename, newline=None):
     """Open utf-8 encoded text file for writing - remember closing it when finished"""
-    return open(filename, "w", encoding="UTF-8")
+    return open(filename, "w", encoding="UTF-8", newline=newline)
 
 
 def open_file_append(filename):
@@ -154,10 +164,24 @@ def is_arrow(inp):
 
 
 def aspect_ratio(image_src):
+    try:
+        image_path = os.path.abspath(image_src)
+        st = os.stat(image_path)
+    except Exception as error:
+        print(f"aspect_ratio(): {type(error).__name__}: {error}")
+        return 1  # Assume 1:1 when unable to read actual image size
+    return _aspect_ratio(image_path, st.st_mtime_ns, st.st_size)
+
+
+# Shared by all harnesses in the process, as the same images are often used by
+# many components; mtime_ns and size are only part of the key to detect changes.
+@lru_cache(maxsize=1024)
+def _aspect_ratio(image_path: str, mtime_ns: int, size: int) -> float:
     try:
         from PIL import Image
 
-        with Image.open(image_src) as image:
+        # Image.open() only reads the image header to get the size
+        with Image.open(image_path) as image:
             if image.width > 0 and image.height > 0:
                 return image.width / image.height
             print(f"aspect_ratio(): Invalid image size {image.width} x {image.height}")
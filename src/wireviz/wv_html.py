@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 
+import os
 import re
+from functools import lru_cache
+from io import StringIO
 from pathlib import Path
-from typing import Callable, Dict, List, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Set, TextIO, Union
 
 from wireviz import APP_NAME, APP_URL, __version__, wv_colors
 from wireviz.DataClasses import Metadata, Options
@@ -10,11 +13,119 @@ from wireviz.svgembed import data_URI_base64
 from wireviz.wv_gv_html import html_line_breaks
 from wireviz.wv_helper import (
     file_read_text,
-    file_write_text,
     flatten2d,
+    open_file_write,
     smart_file_resolve,
 )
 
+# placeholders are written as <!-- %keyword% -->
+placeholder_pattern = re.compile(r"<!-- %([^<>]+?)% -->")
+
+# size of the chunks in which an SVG diagram is copied into the HTML output
+SVG_CHUNK_SIZE = 1 << 16
+
+
+def _template_directories(filename: Union[str, Path, None]) -> List[Path]:
+    # if relative path to template was provided, check directory of YAML file first, fall back to built-in template directory
+    return [
+        Path(filename).parent if filename else Path.cwd(),
+        Path(__file__).parent / "templates",
+    ]
+
+
+def get_template_file(filename: Union[str, Path, None], metadata: Metadata) -> Path:
+    """Return the path of the HTML template to use for the output filename."""
+    templatename = metadata.get("template", {}).get("name")
+    if templatename:
+        return smart_file_resolve(
+            f"{templatename}.html", _template_directories(filename)
+        )
+    else:
+        # fall back to built-in simple template if no template was provided
+        return Path(__file__).parent / "templates/simple.html"
+
+
+def get_template_candidates(
+    filename: Union[str, Path, None], metadata: Metadata
+) -> List[Path]:
+    """Return the paths where the HTML template for the output filename is looked
+    for, in decreasing order of precedence."""
+    templatename = metadata.get("template", {}).get("name")
+    if not templatename:
+        return [get_template_file(filename, metadata)]
+    templatefile = Path(f"{templatename}.html")
+    if templatefile.is_absolute():
+        return [templatefile]
+    return [
+        (directory.resolve() / templatefile).resolve()
+        for directory in _template_directories(filename)
+    ]
+
+
+class HtmlTemplate:
+    """An HTML template, parsed into literal text and placeholder segments."""
+
+    def __init__(self, html: str) -> None:
+        # literal text at even indices, placeholder keywords at odd indices
+        self.segments = placeholder_pattern.split(html)
+        self.placeholders = set(self.segments[1::2])
+
+    def fragments(
+        self, values: Dict[str, Callable[[], Union[str, Iterable[str]]]]
+    ) -> Iterator[str]:
+        """Yield the text fragments of the filled in template.
+
+        values maps placeholder keywords to functions returning the replacement,
+        either as a string or as an iterable of text fragments. Each function is
+        only called when its placeholder is found in the template, and
+        placeholders without a value are kept unchanged.
+        """
+        strings = {}  # string replacements are computed once per page
+        for index, segment in enumerate(self.segments):
+            if index % 2 == 0:
+                yield segment
+            elif segment in strings:
+                yield strings[segment]
+            elif segment in values:
+                value = values[segment]()
+                if isinstance(value, str):
+                    strings[segment] = value
+                    yield value
+                else:
+                    yield from value
+            else:
+                yield f"<!-- %{segment}% -->"
+
+
+def load_template(filename: Union[str, Path, None], metadata: Metadata) -> HtmlTemplate:
+    """Return the parsed HTML template to use for the output filename.
+
+    Parsed templates are cached, and only read and parsed again when the
+    template file was modified.
+    """
+    templatefile = get_template_file(filename, metadata)
+    st = os.stat(templatefile)
+    return _load_template(str(templatefile), st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=16)
+def _load_template(templatefile: str, mtime_ns: int, size: int) -> HtmlTemplate:
+    # TODO?: Warn if unexpected meta charset?
+    return HtmlTemplate(file_read_text(templatefile))
+
+
+def html_diagram_formats(
+    filename: Union[str, Path, None], metadata: Metadata
+) -> Set[str]:
+    """Return the set of diagram formats embedded by the HTML template."""
+    placeholders = load_template(filename, metadata).placeholders
+    formats = set()
+    if "diagram" in placeholders:
+        formats.add("svg")
+    if "diagram_png_b64" in placeholders:
+        formats.add("png")
+    return formats
+
 
 def generate_html_output(
     filename: Union[str, Path],
@@ -22,109 +133,144 @@ def generate_html_output(
     metadata: Metadata,
     options: Options,
 ):
-    # load HTML template
-    templatename = metadata.get("template", {}).get("name")
-    if templatename:
-        # if relative path to template was provided, check directory of YAML file first, fall back to built-in template directory
-        templatefile = smart_file_resolve(
-            f"{templatename}.html",
-            [Path(filename).parent, Path(__file__).parent / "templates"],
+    fragments = html_page_fragments(
+        filename,
+        bom_list,
+        metadata,
+        options,
+        svg=lambda: open(f"{filename}.tmp.svg", encoding="utf-8"),
+        png_data_uri=lambda: data_URI_base64(f"{filename}.png", cache=False),
+    )
+    with open_file_write(f"{filename}.html") as file:
+        file.writelines(fragments)
+
+
+def html_page(
+    filename: Union[str, Path, None],
+    bom_list: List[List[str]],
+    metadata: Metadata,
+    options: Options,
+    svg: Callable[[], str],
+    png_data_uri: Callable[[], str],
+) -> str:
+    """Return the HTML output as a string.
+
+    The diagram is provided by the svg and png_data_uri functions,
+    which are only called if the diagram is used by the template.
+    """
+    return "".join(
+        html_page_fragments(
+            filename,
+            bom_list,
+            metadata,
+            options,
+            svg=lambda: StringIO(svg()),
+            png_data_uri=png_data_uri,
         )
-    else:
-        # fall back to built-in simple template if no template was provided
-        templatefile = Path(__file__).parent / "templates/simple.html"
+    )
+
 
-    html = file_read_text(templatefile)  # TODO?: Warn if unexpected meta charset?
+def html_page_fragments(
+    filename: Union[str, Path, None],
+    bom_list: List[List[str]],
+    metadata: Metadata,
+    options: Options,
+    svg: Callable[[], TextIO],
+    png_data_uri: Callable[[], str],
+) -> Iterator[str]:
+    """Yield the HTML output as text fragments, to write it without building
+    the whole page in memory.
+
+    The SVG diagram is read in chunks from the file object returned by svg.
+    Only the replacements used by the template are computed.
+    """
+    template = load_template(filename, metadata)
 
-    # embed SVG diagram (only if used)
-    def svgdata() -> str:
-        return re.sub(  # TODO?: Verify xml encoding="utf-8" in SVG?
-            "^<[?]xml [^?>]*[?]>[^<]*<!DOCTYPE [^>]*>",
-            "<!-- XML and DOCTYPE declarations from SVG file removed -->",
-            file_read_text(f"{filename}.tmp.svg"),
-            1,
+    # embed SVG diagram
+    def svgdata() -> Iterator[str]:
+        with svg() as file:
+            # the declarations are at the start of the file, within the first chunk
+            yield re.sub(  # TODO?: Verify xml encoding="utf-8" in SVG?
+                "^<[?]xml [^?>]*[?]>[^<]*<!DOCTYPE [^>]*>",
+                "<!-- XML and DOCTYPE declarations from SVG file removed -->",
+                file.read(SVG_CHUNK_SIZE),
+                1,
+            )
+            yield from iter(lambda: file.read(SVG_CHUNK_SIZE), "")
+
+    # generate BOM table, shared by both BOM placeholders
+    @lru_cache(maxsize=None)
+    def bom_table() -> (str, List[str]):
+        bom = flatten2d(bom_list)
+        classes = [f"bom_col_{item.lower()}" for item in bom[0]]
+
+        # generate BOM header (may be at the top or bottom of the table)
+        header = "".join(
+            f'    <th class="{th_class}">{item}</th>\n'
+            for th_class, item in zip(classes, bom[0])
         )
+        header = f"  <tr>\n{header}  </tr>\n"
 
-    # generate BOM table
-    bom = flatten2d(bom_list)
-
-    # generate BOM header (may be at the top or bottom of the table)
-    bom_header_html = "  <tr>\n"
-    for item in bom[0]:
-        th_class = f"bom_col_{item.lower()}"
-        bom_header_html = f'{bom_header_html}    <th class="{th_class}">{item}</th>\n'
-    bom_header_html = f"{bom_header_html}  </tr>\n"
-
-    # generate BOM contents
-    bom_contents = []
-    for row in bom[1:]:
-        row_html = "  <tr>\n"
-        for i, item in enumerate(row):
-            td_class = f"bom_col_{bom[0][i].lower()}"
-            row_html = f'{row_html}    <td class="{td_class}">{item}</td>\n'
-        row_html = f"{row_html}  </tr>\n"
-        bom_contents.append(row_html)
-
-    bom_html = (
-        '<table class="bom">\n' + bom_header_html + "".join(bom_contents) + "</table>\n"
-    )
-    bom_html_reversed = (
-        '<table class="bom">\n'
-        + "".join(list(reversed(bom_contents)))
-        + bom_header_html
-        + "</table>\n"
-    )
+        # generate BOM contents
+        rows = []
+        for row in bom[1:]:
+            cells = "".join(
+                f'    <td class="{td_class}">{item}</td>\n'
+                for td_class, item in zip(classes, row)
+            )
+            rows.append(f"  <tr>\n{cells}  </tr>\n")
+        return header, rows
+
+    def bom_html() -> Iterator[str]:
+        header, rows = bom_table()
+        yield '<table class="bom">\n'
+        yield header
+        yield from rows
+        yield "</table>\n"
+
+    def bom_html_reversed() -> Iterator[str]:
+        header, rows = bom_table()
+        yield '<table class="bom">\n'
+        yield from reversed(rows)
+        yield header
+        yield "</table>\n"
 
     # prepare simple replacements
-    replacements = {
-        "<!-- %generator% -->": f"{APP_NAME} {__version__} - {APP_URL}",
-        "<!-- %fontname% -->": options.fontname,
-        "<!-- %bgcolor% -->": wv_colors.translate_color(options.bgcolor, "hex"),
-        "<!-- %filename% -->": str(filename),
-        "<!-- %filename_stem% -->": Path(filename).stem,
-        "<!-- %bom% -->": bom_html,
-        "<!-- %bom_reversed% -->": bom_html_reversed,
-        "<!-- %sheet_current% -->": "1",  # TODO: handle multi-page documents
-        "<!-- %sheet_total% -->": "1",  # TODO: handle multi-page documents
-        "<!-- %template_sheetsize% -->": metadata.get("template", {}).get(
-            "sheetsize", ""
-        ),
+    values = {
+        "generator": lambda: f"{APP_NAME} {__version__} - {APP_URL}",
+        "fontname": lambda: options.fontname,
+        "bgcolor": lambda: wv_colors.translate_color(options.bgcolor, "hex"),
+        "filename": lambda: str(filename) if filename else "",
+        "filename_stem": lambda: Path(filename).stem if filename else "",
+        "bom": bom_html,
+        "bom_reversed": bom_html_reversed,
+        "sheet_current": lambda: "1",  # TODO: handle multi-page documents
+        "sheet_total": lambda: "1",  # TODO: handle multi-page documents
+        "template_sheetsize": lambda: metadata.get("template", {}).get("sheetsize", ""),
+        "diagram": svgdata,
+        "diagram_png_b64": png_data_uri,
     }
 
-    def replacement_if_used(key: str, func: Callable[[], str]) -> None:
-        """Append replacement only if used in html."""
-        if key in html:
-            replacements[key] = func()
+    def value(text: str) -> Callable[[], str]:
+        return lambda: text
 
-    replacement_if_used("<!-- %diagram% -->", svgdata)
-    replacement_if_used(
-        "<!-- %diagram_png_b64% -->", lambda: data_URI_base64(f"{filename}.png")
-    )
+    def line_breaks(text: str) -> Callable[[], str]:
+        return lambda: html_line_breaks(text)
 
     # prepare metadata replacements
     if metadata:
         for item, contents in metadata.items():
             if isinstance(contents, (str, int, float)):
-                replacements[f"<!-- %{item}% -->"] = html_line_breaks(str(contents))
+                values[item] = line_breaks(str(contents))
             elif isinstance(contents, Dict):  # useful for authors, revisions
                 for index, (category, entry) in enumerate(contents.items()):
                     if isinstance(entry, Dict):
-                        replacements[f"<!-- %{item}_{index+1}% -->"] = str(category)
+                        values[f"{item}_{index+1}"] = value(str(category))
                         for entry_key, entry_value in entry.items():
-                            replacements[
-                                f"<!-- %{item}_{index+1}_{entry_key}% -->"
-                            ] = html_line_breaks(str(entry_value))
+                            values[f"{item}_{index+1}_{entry_key}"] = line_breaks(
+                                str(entry_value)
+                            )
                     elif isinstance(entry, (str, int, float)):
-                        pass  # TODO?: replacements[f"<!-- %{item}_{category}% -->"] = html_line_breaks(str(entry))
-
-    # perform replacements
-    # regex replacement adapted from:
-    # https://gist.github.com/bgusach/a967e0587d6e01e889fd1d776c5f3729
-
-    # longer replacements first, just in case
-    replacements_sorted = sorted(replacements, key=len, reverse=True)
-    replacements_escaped = map(re.escape, replacements_sorted)
-    pattern = re.compile("|".join(replacements_escaped))
-    html = pattern.sub(lambda match: replacements[match.group(0)], html)
+                        pass  # TODO?: values[f"{item}_{category}"] = line_breaks(str(entry))
 
-    file_write_text(f"{filename}.html", html)
+    return template.fragments(values)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterable, Iterator, List, Optional, Union
+
+TraceEvent = Dict[str, Any]
+
+
+class Profiler:
+    """Recorder of the time spent in the processing stages, as nested spans.
+
+    The spans are kept as complete events ("ph": "X") of the Chrome trace event
+    format, that can be viewed in chrome://tracing or https://ui.perfetto.dev.
+    Spans are nested by their start time and duration within each process and thread.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[TraceEvent] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        """Record the time spent in the with block as a span named name,
+        with the args shown as details of the span."""
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": start / 1000,  # microseconds
+                "dur": (end - start) / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            }
+            if args:
+                event["args"] = {key: str(value) for key, value in args.items()}
+            with self._lock:
+                self.events.append(event)
+
+    def extend(self, events: Iterable[TraceEvent]) -> None:
+        """Add events recorded by another profiler, e.g. in a worker process."""
+        with self._lock:
+            self.events.extend(events)
+
+    def write_trace(self, filename: Union[str, Path]) -> None:
+        """Write the recorded spans to filename as Chrome trace event JSON."""
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event["ts"])
+        start = events[0]["ts"] if events else 0
+        trace = [{**event, "ts": event["ts"] - start} for event in events]
+        Path(filename).write_text(
+            json.dumps({"traceEvents": trace, "displayTimeUnit": "ms"}),
+            encoding="utf-8",
+        )
+
+    def summary(self) -> str:
+        """Return a table of the number of spans and the time spent per stage.
+
+        The self time of a span excludes the time of the spans nested in it,
+        so the self times of all stages in a thread add up to its total time.
+        """
+        with self._lock:
+            events = list(self.events)
+        stages: Dict[str, List[float]] = {}  # name: [count, total, self, max]
+        for event, self_time in zip(events, _self_times(events)):
+            stage = stages.setdefault(event["name"], [0, 0.0, 0.0, 0.0])
+            stage[0] += 1
+            stage[1] += event["dur"]
+            stage[2] += self_time
+            stage[3] = max(stage[3], event["dur"])
+
+        width = max([len("Stage")] + [len(name) for name in stages])
+        header = ("Count", "Total [ms]", "Self [ms]", "Mean [ms]", "Max [ms]")
+        lines = [f"{'Stage':<{width}}" + "".join(f"{h:>12}" for h in header)]
+        for name, (count, total, self_total, max_dur) in sorted(
+            stages.items(), key=lambda item: -item[1][1]
+        ):
+            times = (total, self_total, total / count, max_dur)
+            lines.append(
+                f"{name:<{width}}{count:>12}"
+                + "".join(f"{t / 1000:>12.1f}" for t in times)
+            )
+        return "\n".join(lines)
+
+
+def _self_times(events: List[TraceEvent]) -> List[float]:
+    """Return the duration of each event minus that of its direct children."""
+    self_times = [event["dur"] for event in events]
+    threads: Dict[tuple, List[int]] = {}
+    for i, event in enumerate(events):
+        threads.setdefault((event["pid"], event["tid"]), []).append(i)
+    for indices in threads.values():
+        # parents first when starting at the same time
+        indices.sort(key=lambda i: (events[i]["ts"], -events[i]["dur"]))
+        stack = []  # indices of the enclosing spans
+        for i in indices:
+            start = events[i]["ts"]
+            while stack and events[stack[-1]]["ts"] + events[stack[-1]]["dur"] <= start:
+                stack.pop()
+            if stack:
+                self_times[stack[-1]] -= events[i]["dur"]
+            stack.append(i)
+    return self_times
+
+
+# profiler recording the spans of all stages, disabled by default
+profiler: Optional[Profiler] = None
+
+
+def set_profiler(new_profiler: Optional[Profiler]) -> Optional[Profiler]:
+    """Record the processing stages with new_profiler, or stop recording if None.
+    Return the profiler used before."""
+    global profiler
+    old_profiler, profiler = profiler, new_profiler
+    return old_profiler
+
+
+def span(name: str, **args: Any) -> ContextManager:
+    """Return a context manager recording a span with the current profiler,
+    or doing nothing when not profiling."""
+    current = profiler
+    return current.span(name, **args) if current else nullcontext()
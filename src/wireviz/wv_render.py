@@ -0,0 +1,898 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import atexit
+import hashlib
+import os
+import queue
+import re
+import select
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import graphviz
+from wireviz.wv_dot import attr_list
+from wireviz.wv_profile import span
+
+GRAPHVIZ_ENGINE = "dot"
+# programs used to combine separately laid out graphs into one diagram
+PACK_PROGRAM = "gvpack"
+PACKED_ENGINE = "neato"
+
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024  # bytes
+# time a Graphviz worker may take to render a graph before it is stopped
+WORKER_TIMEOUT = 60.0  # seconds
+
+
+@lru_cache(maxsize=None)
+def graphviz_version() -> Tuple[int, ...]:
+    """Return the version of the installed Graphviz (only determined once per process)."""
+    return graphviz.version()
+
+
+class RenderCache:
+    """On-disk cache of rendered Graphviz output with least recently used eviction.
+
+    Entries are keyed on a hash of the graph source, the output format,
+    the Graphviz version, and the size and modification time of any image
+    files referenced by the graph source.
+
+    The total size of the cache is determined by scanning the directory once,
+    and then kept up to date while adding entries; the directory is only scanned
+    again when entries need to be evicted. Eviction then frees some headroom below
+    max_size, to not scan again for each entry added to a full cache.
+    """
+
+    EVICT_TARGET = 0.9  # fraction of max_size to fill after evicting
+
+    def __init__(
+        self, directory: Union[str, Path], max_size: int = DEFAULT_CACHE_SIZE
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.size: Optional[int] = None  # total size, determined when first needed
+        self._lock = threading.Lock()
+
+    def key(self, source: str, fmt: str) -> str:
+        h = hashlib.sha256()
+        h.update(f"{graphviz_version()}\0{fmt}\0".encode("utf-8"))
+        h.update(source.encode("utf-8"))
+        for src in sorted(set(re.findall(r'<img [^>]*src="([^"]*)"', source))):
+            try:
+                st = os.stat(src)
+                h.update(f"\0{src}\0{st.st_size}\0{st.st_mtime_ns}".encode("utf-8"))
+            except OSError:
+                h.update(f"\0{src}\0-".encode("utf-8"))
+        return h.hexdigest()
+
+    def entry(self, key: str, fmt: str) -> Path:
+        return self.directory / f"{key}.{fmt}"
+
+    def get(self, key: str, fmt: str) -> Optional[Path]:
+        """Return path of the cached entry, or None if not in the cache."""
+        entry = self.entry(key, fmt)
+        try:
+            os.utime(entry)  # mark as recently used
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, fmt: str, data: bytes) -> None:
+        """Store data in the cache, and evict old entries if needed."""
+        # write into a temporary file first to allow concurrent use of the cache
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        entry = self.entry(key, fmt)
+        try:
+            replaced = entry.stat().st_size
+        except OSError:
+            replaced = 0
+        os.replace(tmp, entry)
+        with self._lock:
+            if self.size is None:
+                self.size = self._scan_size()
+            else:
+                self.size += len(data) - replaced
+            if self.size <= self.max_size:
+                return
+        self.evict()
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        """Return the modification time, size and path of all entries."""
+        entries = []
+        for entry in self.directory.iterdir():
+            if entry.suffix == ".tmp":  # being written by a concurrent process
+                continue
+            try:
+                st = entry.stat()
+            except OSError:  # deleted by a concurrent process
+                continue
+            entries.append((st.st_mtime, st.st_size, entry))
+        return entries
+
+    def evict(self) -> None:
+        """Delete the least recently used entries until the cache fits
+        EVICT_TARGET of max_size."""
+        # rescan, as concurrent processes might have added or evicted entries
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_size * self.EVICT_TARGET
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= target:
+                break
+            try:
+                entry.unlink()
+            except FileNotFoundError:  # deleted by a concurrent process
+                pass
+            total -= size
+        with self._lock:
+            self.size = total
+
+    def stats(self) -> Tuple[int, int]:
+        """Return the number of cache hits and misses so far."""
+        return self.hits, self.misses
+
+
+# cache used for all rendering, disabled by default
+render_cache: Optional[RenderCache] = None
+
+
+def set_render_cache(
+    directory: Union[str, Path, None], max_size: int = DEFAULT_CACHE_SIZE
+) -> Optional[RenderCache]:
+    """Enable the render cache in directory, or disable it if directory is None."""
+    global render_cache
+    render_cache = RenderCache(directory, max_size) if directory else None
+    return render_cache
+
+
+def run_graphviz(
+    args: List[str],
+    source: Union[str, Iterable[str]],
+    encoding: str = "utf-8",
+    program: str = GRAPHVIZ_ENGINE,
+    timeout: Optional[float] = None,
+) -> bytes:
+    """Run the Graphviz layout engine (or another Graphviz program)
+    with the graph source as input, and return its output.
+
+    The source is either a string, or an iterable of parts of the source
+    that are written to Graphviz one by one, without joining them first.
+    If Graphviz runs longer than timeout seconds, it is killed
+    and subprocess.TimeoutExpired is raised.
+    """
+    with span(program, args=" ".join(args)):
+        return _run_graphviz(args, source, encoding, program, timeout)
+
+
+def _run_graphviz(
+    args: List[str],
+    source: Union[str, Iterable[str]],
+    encoding: str,
+    program: str,
+    timeout: Optional[float],
+) -> bytes:
+    cmd = [program] + args
+    if timeout is not None and not isinstance(source, str):
+        source = "".join(source)
+    if isinstance(source, str):
+        try:
+            proc = subprocess.run(
+                cmd,
+                input=source.encode(encoding),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=timeout,
+            )
+        except FileNotFoundError as e:
+            raise graphviz.ExecutableNotFound(cmd) from e
+        return check_graphviz_result(
+            cmd, proc.returncode, proc.stdout, proc.stderr, encoding
+        )
+
+    try:
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except FileNotFoundError as e:
+        raise graphviz.ExecutableNotFound(cmd) from e
+    # read the output while writing, in case Graphviz starts writing before
+    # reading all input (e.g. warnings) and blocks on a full pipe
+    output = {}
+
+    def read(name: str) -> None:
+        output[name] = getattr(proc, name).read()
+
+    readers = [
+        threading.Thread(target=read, args=(name,)) for name in ("stdout", "stderr")
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        for part in source:
+            proc.stdin.write(part.encode(encoding))
+    except BrokenPipeError:
+        pass  # Graphviz stopped reading, its error is reported below
+    finally:
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        for reader in readers:
+            reader.join()
+        proc.wait()
+    return check_graphviz_result(
+        cmd, proc.returncode, output["stdout"], output["stderr"], encoding
+    )
+
+
+def check_graphviz_result(
+    cmd: List[str], returncode: int, stdout: bytes, stderr: bytes, encoding: str
+) -> bytes:
+    """Pass on any Graphviz warnings, and return its output or raise if it failed."""
+    if stderr:  # pass on any warnings from Graphviz
+        sys.stderr.write(stderr.decode(encoding, errors="replace"))
+    if returncode:
+        raise graphviz.CalledProcessError(returncode, cmd, output=stdout, stderr=stderr)
+    return stdout
+
+
+# maximum number of concurrent Graphviz processes started by run_graphviz_async()
+async_concurrency = os.cpu_count() or 1
+# semaphores enforcing async_concurrency, one per event loop
+_async_semaphores = weakref.WeakKeyDictionary()
+
+
+def set_async_concurrency(limit: int) -> None:
+    """Set the maximum number of concurrent Graphviz processes started by the async API."""
+    global async_concurrency
+    if limit < 1:
+        raise ValueError("The async concurrency limit must be at least 1")
+    async_concurrency = limit
+    _async_semaphores.clear()  # new limit applies to semaphores created from now
+
+
+def _async_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in _async_semaphores:
+        _async_semaphores[loop] = asyncio.Semaphore(async_concurrency)
+    return _async_semaphores[loop]
+
+
+async def run_graphviz_async(
+    args: List[str],
+    source: str,
+    encoding: str = "utf-8",
+    program: str = GRAPHVIZ_ENGINE,
+    timeout: Optional[float] = None,
+) -> bytes:
+    """Like run_graphviz(), but as an asynchronous subprocess,
+    waiting while the maximum number of concurrent processes are running."""
+    cmd = [program] + args
+    async with _async_semaphore():
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except FileNotFoundError as e:
+            raise graphviz.ExecutableNotFound(cmd) from e
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                proc.communicate(source.encode(encoding)), timeout
+            )
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise subprocess.TimeoutExpired(cmd, timeout)
+    return check_graphviz_result(cmd, proc.returncode, stdout, stderr, encoding)
+
+
+# Graph attributes of the layout presets tried in turn when laying out a graph
+# takes too long, from the default layout to the cheapest one, together with
+# the rough fraction of the time of the default layout they need.
+LAYOUT_PRESETS: List[Tuple[str, float, Dict[str, str]]] = [
+    ("default", 1.0, {}),
+    (
+        "fast",
+        0.5,
+        {"nslimit": "4", "nslimit1": "4", "mclimit": "0.5", "searchsize": "10"},
+    ),
+    (
+        "faster",
+        0.2,
+        {
+            "nslimit": "1",
+            "nslimit1": "1",
+            "mclimit": "0.2",
+            "searchsize": "5",
+            "splines": "polyline",
+            "ranksep": "1",
+        },
+    ),
+    (
+        "fastest",
+        0.05,
+        {
+            "nslimit": "0.2",
+            "nslimit1": "0.2",
+            "mclimit": "0.05",
+            "searchsize": "1",
+            "splines": "line",
+            "ranksep": "0.5",
+        },
+    ),
+]
+
+# rough time dot needs per (node + edge + port) ** 1.5 of a WireViz graph
+LAYOUT_SECONDS_PER_UNIT = 1e-5
+
+
+def estimate_layout_time(nodes: int, edges: int, ports: int) -> float:
+    """Return a rough estimate of the seconds needed by the default dot layout
+    of a graph with the given number of nodes, edges and (HTML label) ports."""
+    return LAYOUT_SECONDS_PER_UNIT * (nodes + edges + ports) ** 1.5
+
+
+class LayoutBudget:
+    """Time limit for laying out a graph, and the estimated time of its default layout.
+
+    Graphviz is run with the cheapest preset of LAYOUT_PRESETS estimated to finish
+    within the timeout, and with the next cheaper preset each time it times out.
+    """
+
+    def __init__(self, timeout: float, estimate: float = 0.0) -> None:
+        self.timeout = timeout
+        self.estimate = estimate
+
+    def presets(self) -> List[Tuple[str, float, Dict[str, str]]]:
+        """Return the presets to try in turn, skipping those estimated to be too slow."""
+        for i, (name, factor, _) in enumerate(LAYOUT_PRESETS):
+            if self.estimate * factor <= self.timeout:
+                break
+        if i:
+            sys.stderr.write(
+                f"Estimated Graphviz layout time {self.estimate:.3g} s "
+                f"exceeds the layout timeout of {self.timeout} s\n"
+            )
+        return LAYOUT_PRESETS[i:]
+
+    def attempts(self, source: Union[str, Iterable[str]]) -> Iterator[str]:
+        """Yield the source with the graph attributes of each preset to try in turn,
+        until the caller stops iterating after a layout finished in time."""
+        if not isinstance(source, str):
+            source = "".join(source)
+        presets = self.presets()
+        for i, (name, _, attrs) in enumerate(presets):
+            if i or name != LAYOUT_PRESETS[0][0]:
+                sys.stderr.write(f"Using the '{name}' Graphviz layout preset\n")
+            yield with_graph_attrs(source, attrs)
+            if i + 1 < len(presets):
+                sys.stderr.write(
+                    f"Graphviz layout did not finish within {self.timeout} s "
+                    f"with the '{name}' layout preset\n"
+                )
+        raise Exception(
+            f"Graphviz layout did not finish within {self.timeout} s, "
+            f"even with the '{presets[-1][0]}' layout preset"
+        )
+
+
+def with_graph_attrs(source: str, attrs: Dict[str, str]) -> str:
+    """Return the graph source with the graph attributes set at its end,
+    overriding any earlier values."""
+    if not attrs:
+        return source
+    end = source.rindex("}")
+    return f"{source[:end]}\tgraph{attr_list(None, attrs)}\n{source[end:]}"
+
+
+def run_graphviz_within(
+    budget: Optional[LayoutBudget],
+    args: List[str],
+    source: Union[str, Iterable[str]],
+    encoding: str = "utf-8",
+) -> bytes:
+    """Like run_graphviz(), but retrying with cheaper layout presets
+    whenever the layout does not finish within the budget."""
+    if budget is None:
+        return run_graphviz(args, source, encoding)
+    for attempt in budget.attempts(source):
+        try:
+            return run_graphviz(args, attempt, encoding, timeout=budget.timeout)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+async def run_graphviz_within_async(
+    budget: Optional[LayoutBudget],
+    args: List[str],
+    source: str,
+    encoding: str = "utf-8",
+) -> bytes:
+    """Like run_graphviz_within(), but as an asynchronous subprocess."""
+    if budget is None:
+        return await run_graphviz_async(args, source, encoding)
+    for attempt in budget.attempts(source):
+        try:
+            return await run_graphviz_async(
+                args, attempt, encoding, timeout=budget.timeout
+            )
+        except subprocess.TimeoutExpired:
+            pass
+
+
+class GraphvizWorker:
+    """A long-lived Graphviz process rendering graphs into one output format.
+
+    Graph sources are written one by one to its stdin, and Graphviz renders each
+    graph as soon as it has been read. The end of each rendered graph is detected
+    from the structure of the output format, which is why only PNG and SVG are
+    supported. Messages from Graphviz are read from stderr along with the output;
+    as Graphviz writes them unbuffered before the output, they are attributed to
+    the graph being rendered. Reading waits on both pipes with select(), which
+    is why workers are only supported on POSIX systems.
+    """
+
+    formats = ("png", "svg")
+
+    def __init__(self, fmt: str, timeout: float = WORKER_TIMEOUT) -> None:
+        if fmt not in self.formats:
+            raise ValueError(f"Unsupported format for GraphvizWorker: {fmt}")
+        self.fmt = fmt
+        self.timeout = timeout
+        self.cmd = [GRAPHVIZ_ENGINE, f"-T{fmt}"]
+        try:
+            self.proc = subprocess.Popen(
+                self.cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        except FileNotFoundError as e:
+            raise graphviz.ExecutableNotFound(self.cmd) from e
+        self._complete = self._complete_png if fmt == "png" else self._complete_svg
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def render(self, source: str, encoding: str = "utf-8") -> bytes:
+        """Return the graph source rendered by this worker.
+
+        Raise CalledProcessError if Graphviz reported an error for the graph,
+        and TimeoutExpired if it did not finish within the timeout. The worker
+        is stopped in both cases, and cannot be used any more."""
+        try:
+            self.proc.stdin.write(source.encode(encoding))
+            self.proc.stdin.write(b"\n")
+            self.proc.stdin.flush()
+        except OSError:
+            pass  # the process has ended, reported below with its stderr
+        output, stderr, error = self._read_output()
+        if error or not self._complete(output):
+            self.kill()
+            returncode = self.proc.returncode
+            raise graphviz.CalledProcessError(
+                returncode if returncode and returncode > 0 else 1,
+                self.cmd,
+                output=bytes(output),
+                stderr=bytes(stderr),
+            )
+        if stderr:  # pass on warnings from Graphviz
+            sys.stderr.write(stderr.decode(errors="replace"))
+        return bytes(output)
+
+    def _read_output(self) -> Tuple[bytearray, bytearray, bool]:
+        """Read the output and stderr of the current graph, until the output is
+        complete, an error is reported, or the process ends."""
+        stdout, stderr = self.proc.stdout.fileno(), self.proc.stderr.fileno()
+        buffers = {stdout: bytearray(), stderr: bytearray()}
+        open_fds = [stdout, stderr]
+        deadline = time.monotonic() + self.timeout
+        while open_fds:
+            if self._complete(buffers[stdout]):
+                # messages written before the output are already in the pipe
+                ready, _, _ = select.select([stderr], [], [], 0)
+                if not ready or stderr not in open_fds:
+                    break
+            else:
+                remaining = deadline - time.monotonic()
+                ready, _, _ = select.select(open_fds, [], [], max(remaining, 0))
+                if not ready:
+                    self.kill()
+                    raise subprocess.TimeoutExpired(
+                        self.cmd, self.timeout, stderr=bytes(buffers[stderr])
+                    )
+            for fd in ready:
+                data = os.read(fd, 1 << 16)
+                if data:
+                    buffers[fd] += data
+                else:  # the process has ended
+                    open_fds.remove(fd)
+            if re.search(rb"^Error", buffers[stderr], re.MULTILINE):
+                # Graphviz may or may not write output for a graph with errors;
+                # stop the process and read the rest of the message
+                self.kill()
+                buffers[stderr] += self.proc.stderr.read()
+                return buffers[stdout], buffers[stderr], True
+        return buffers[stdout], buffers[stderr], False
+
+    @staticmethod
+    def _complete_png(data: bytearray) -> bool:
+        # a PNG file is a signature followed by chunks, the last one of type IEND
+        pos = 8
+        while pos + 8 <= len(data):
+            length, chunk_type = struct.unpack_from(">I4s", data, pos)
+            pos += 8 + length + 4  # chunk header, data and CRC
+            if chunk_type == b"IEND":
+                return pos <= len(data)
+        return False
+
+    @staticmethod
+    def _complete_svg(data: bytearray) -> bool:
+        # the SVG output of Graphviz ends with a line containing the closing tag
+        return data.endswith(b"\n") and data[-16:].split()[-1:] == [b"</svg>"]
+
+    def kill(self) -> None:
+        if self.alive():
+            self.proc.kill()
+        self.proc.wait()
+
+    def close(self) -> None:
+        if self.alive():
+            self.proc.stdin.close()
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.kill()
+
+
+class GraphvizWorkerPool:
+    """A pool of long-lived Graphviz processes, to avoid starting a new process
+    (and loading its plugins) for every rendered graph.
+
+    Up to size workers are started on demand for each output format.
+    """
+
+    def __init__(self, size: int, timeout: float = WORKER_TIMEOUT) -> None:
+        if size < 1:
+            raise ValueError("The worker pool size must be at least 1")
+        self.size = size
+        self.timeout = timeout
+        self._idle = {fmt: queue.LifoQueue() for fmt in GraphvizWorker.formats}
+        self._started = {fmt: 0 for fmt in GraphvizWorker.formats}
+        self._lock = threading.Lock()
+
+    def supports(self, fmt: str) -> bool:
+        return fmt in GraphvizWorker.formats
+
+    def render(self, source: str, fmt: str, encoding: str = "utf-8") -> bytes:
+        """Return the graph source rendered in the output format by an idle worker."""
+        with self._lock:
+            start = self._idle[fmt].empty() and self._started[fmt] < self.size
+            if start:
+                self._started[fmt] += 1
+        try:
+            if start:
+                worker = GraphvizWorker(fmt, self.timeout)
+            else:
+                worker = self._idle[fmt].get()
+        except Exception:
+            with self._lock:
+                self._started[fmt] -= 1
+            raise
+        try:
+            with span(GRAPHVIZ_ENGINE, args=f"-T{fmt}", worker=True):
+                data = worker.render(source, encoding)
+        finally:
+            if worker.alive():
+                self._idle[fmt].put(worker)
+            else:
+                worker.kill()
+                with self._lock:  # the worker has stopped, allow starting a new one
+                    self._started[fmt] -= 1
+        return data
+
+    def close(self) -> None:
+        """Stop all idle workers."""
+        for fmt, idle in self._idle.items():
+            while not idle.empty():
+                idle.get().close()
+                with self._lock:
+                    self._started[fmt] -= 1
+
+
+# worker pool used for rendering, disabled by default
+worker_pool: Optional[GraphvizWorkerPool] = None
+
+
+def set_worker_pool(
+    size: int, timeout: float = WORKER_TIMEOUT
+) -> Optional[GraphvizWorkerPool]:
+    """Render using a pool of long-lived Graphviz processes with up to size workers
+    per output format, or using a new Graphviz process for each rendering if size is 0.
+    Each worker may take up to timeout seconds to render a graph.
+    """
+    global worker_pool
+    if worker_pool:
+        worker_pool.close()
+    if size and os.name != "posix":
+        print(
+            "Warning: Graphviz workers are not supported on this system,"
+            " starting Graphviz for each diagram instead.",
+            file=sys.stderr,
+        )
+        size = 0
+    worker_pool = GraphvizWorkerPool(size, timeout) if size else None
+    if worker_pool:
+        atexit.register(worker_pool.close)
+    return worker_pool
+
+
+def render_to_files(
+    source: Union[str, Iterable[str]],
+    outfiles: Dict[str, Union[str, Path]],
+    encoding: str = "utf-8",
+    budget: Optional[LayoutBudget] = None,
+) -> None:
+    """Lay out the graph source once, and render it into one file per output format.
+
+    outfiles maps each Graphviz output format (e.g. "png", "svg") to its file name.
+    The source can also be an iterable of parts of the source, that are streamed
+    to Graphviz unless the render cache, worker pool or layout budget need the
+    whole source. The worker pool is only used when a single format is rendered.
+    With a budget, the worker pool is not used, and Graphviz is run again with
+    cheaper layout presets whenever the layout takes too long.
+    """
+    cache = render_cache
+    pool = worker_pool if budget is None else None
+    if not isinstance(source, str) and (cache or pool or budget):
+        source = "".join(source)
+    if cache:
+        keys = {fmt: cache.key(source, fmt) for fmt in outfiles}
+        outfiles = _copy_cached(cache, keys, outfiles)
+        if not outfiles:  # all formats found in cache, no need to run Graphviz
+            return
+
+    if pool and len(outfiles) == 1 and pool.supports(next(iter(outfiles))):
+        # a worker renders a single format, so it only saves time when one format
+        # is needed; a single Graphviz run lays out the graph once for all formats
+        ((fmt, outfile),) = outfiles.items()
+        Path(outfile).write_bytes(pool.render(source, fmt, encoding))
+    else:
+        args = []
+        for fmt, outfile in outfiles.items():
+            args += [f"-T{fmt}", f"-o{outfile}"]
+        if args:
+            run_graphviz_within(budget, args, source, encoding)
+
+    if cache:
+        for fmt, outfile in outfiles.items():
+            cache.put(keys[fmt], fmt, Path(outfile).read_bytes())
+
+
+def _copy_cached(
+    cache: RenderCache, keys: Dict[str, str], outfiles: Dict[str, Union[str, Path]]
+) -> Dict[str, Union[str, Path]]:
+    """Copy the cached entries to their output files,
+    and return the output files of the formats not found in the cache."""
+    missing = {}
+    for fmt, outfile in outfiles.items():
+        entry = cache.get(keys[fmt], fmt)
+        if entry:
+            shutil.copyfile(entry, outfile)
+        else:
+            missing[fmt] = outfile
+    return missing
+
+
+def render_to_bytes(
+    source: str,
+    fmt: str,
+    encoding: str = "utf-8",
+    budget: Optional[LayoutBudget] = None,
+) -> bytes:
+    """Lay out the graph source, and return it rendered in the output format.
+    With a budget, the layout is limited like in render_to_files()."""
+    cache = render_cache
+    if cache:
+        key = cache.key(source, fmt)
+        entry = cache.get(key, fmt)
+        if entry:
+            return entry.read_bytes()
+
+    pool = worker_pool if budget is None else None
+    if pool and pool.supports(fmt):
+        data = pool.render(source, fmt, encoding)
+    else:
+        data = run_graphviz_within(budget, [f"-T{fmt}"], source, encoding)
+
+    if cache:
+        cache.put(key, fmt, data)
+    return data
+
+
+async def render_to_bytes_async(
+    source: str,
+    fmt: str,
+    encoding: str = "utf-8",
+    budget: Optional[LayoutBudget] = None,
+) -> bytes:
+    """Like render_to_bytes(), but running Graphviz as an asynchronous subprocess."""
+    cache = render_cache
+    if cache:
+        key = cache.key(source, fmt)
+        entry = cache.get(key, fmt)
+        if entry:
+            return entry.read_bytes()
+
+    data = await run_graphviz_within_async(budget, [f"-T{fmt}"], source, encoding)
+
+    if cache:
+        cache.put(key, fmt, data)
+    return data
+
+
+# maximum number of graphs laid out concurrently by layout_packed()
+layout_concurrency = os.cpu_count() or 1
+
+
+def layout_packed(
+    sources: List[str],
+    encoding: str = "utf-8",
+    budgets: Optional[List[Optional[LayoutBudget]]] = None,
+) -> str:
+    """Lay out each graph source in a separate Graphviz process, in parallel,
+    and return the layouts packed into one graph, ready for rendering with
+    PACKED_ENGINE -n2, which keeps the computed positions.
+
+    The layout of each graph is cached like any other output format,
+    so unchanged graphs are not laid out again when using the render cache.
+    The optional budgets limit the layout of each graph (see render_to_files()).
+    """
+    budgets = budgets or [None] * len(sources)
+    with span("layout_packed", graphs=len(sources)):
+        with ThreadPoolExecutor(min(len(sources), layout_concurrency)) as executor:
+            layouts = list(
+                executor.map(
+                    lambda source, budget: render_to_bytes(
+                        source, "dot", encoding, budget
+                    ),
+                    sources,
+                    budgets,
+                )
+            )
+    # pack each laid out graph as a unit (-g), keeping its internal layout
+    packed = run_graphviz(
+        ["-g"], _joined_layouts(layouts, encoding), encoding, program=PACK_PROGRAM
+    )
+    return packed.decode(encoding)
+
+
+async def layout_packed_async(
+    sources: List[str],
+    encoding: str = "utf-8",
+    budgets: Optional[List[Optional[LayoutBudget]]] = None,
+) -> str:
+    """Like layout_packed(), but running Graphviz as asynchronous subprocesses."""
+    budgets = budgets or [None] * len(sources)
+    layouts = await asyncio.gather(
+        *(
+            render_to_bytes_async(source, "dot", encoding, budget)
+            for source, budget in zip(sources, budgets)
+        )
+    )
+    packed = await run_graphviz_async(
+        ["-g"], _joined_layouts(layouts, encoding), encoding, program=PACK_PROGRAM
+    )
+    return packed.decode(encoding)
+
+
+def _joined_layouts(layouts: List[bytes], encoding: str) -> str:
+    return "".join(layout.decode(encoding) for layout in layouts)
+
+
+def _packed_source(sources: List[str]) -> str:
+    """Return the graph sources joined into one, to key the packed diagram
+    in the render cache apart from the same graphs laid out together."""
+    return "\0".join([PACK_PROGRAM, PACKED_ENGINE] + sources)
+
+
+def render_packed_to_files(
+    sources: List[str],
+    outfiles: Dict[str, Union[str, Path]],
+    encoding: str = "utf-8",
+    budgets: Optional[List[Optional[LayoutBudget]]] = None,
+) -> None:
+    """Like render_to_files(), but laying out the graph sources separately
+    and packing them into one diagram (see layout_packed())."""
+    cache = render_cache
+    if cache:
+        packed_source = _packed_source(sources)
+        keys = {fmt: cache.key(packed_source, fmt) for fmt in outfiles}
+        outfiles = _copy_cached(cache, keys, outfiles)
+        if not outfiles:  # all formats found in cache, no need to run Graphviz
+            return
+
+    packed = layout_packed(sources, encoding, budgets)
+    args = ["-n2"]
+    for fmt, outfile in outfiles.items():
+        args += [f"-T{fmt}", f"-o{outfile}"]
+    run_graphviz(args, packed, encoding, program=PACKED_ENGINE)
+
+    if cache:
+        for fmt, outfile in outfiles.items():
+            cache.put(keys[fmt], fmt, Path(outfile).read_bytes())
+
+
+def render_packed_to_bytes(
+    sources: List[str],
+    fmt: str,
+    encoding: str = "utf-8",
+    budgets: Optional[List[Optional[LayoutBudget]]] = None,
+) -> bytes:
+    """Like render_to_bytes(), but laying out the graph sources separately
+    and packing them into one diagram (see layout_packed())."""
+    cache = render_cache
+    if cache:
+        key = cache.key(_packed_source(sources), fmt)
+        entry = cache.get(key, fmt)
+        if entry:
+            return entry.read_bytes()
+
+    packed = layout_packed(sources, encoding, budgets)
+    data = run_graphviz(["-n2", f"-T{fmt}"], packed, encoding, program=PACKED_ENGINE)
+
+    if cache:
+        cache.put(key, fmt, data)
+    return data
+
+
+async def render_packed_to_bytes_async(
+    sources: List[str],
+    fmt: str,
+    encoding: str = "utf-8",
+    budgets: Optional[List[Optional[LayoutBudget]]] = None,
+) -> bytes:
+    """Like render_packed_to_bytes(), but running Graphviz as asynchronous subprocesses."""
+    cache = render_cache
+    if cache:
+        key = cache.key(_packed_source(sources), fmt)
+        entry = cache.get(key, fmt)
+        if entry:
+            return entry.read_bytes()
+
+    packed = await layout_packed_async(sources, encoding, budgets)
+    data = await run_graphviz_async(
+        ["-n2", f"-T{fmt}"], packed, encoding, program=PACKED_ENGINE
+    )
+
+    if cache:
+        cache.put(key, fmt, data)
+    return data